@@ -1,142 +1,182 @@
-import numpy as np
-import matplotlib.pyplot as plt
+import json
+
 import streamlit as st
-import requests
-from itertools import combinations
-from scipy.special import comb
-from io import BytesIO
+
+import cleland_core
+from blot_render import rasterize_immunoblot, render_immunoblot_png
+from calibration import CalibrationModel
+from cleland_core import protein_summary
+
+# Heavy modules (pandas, Biopython, matplotlib, requests) are imported on first use
+# so a cold start only loads Streamlit and numpy.
+
+# Cache limits: sequences rarely change, rendered PNGs are large
+SEQUENCE_TTL = 24 * 3600
+RENDER_TTL = 3600
+
+# Calibrations are keyed by their fitted parameters rather than by pickling the object
+CALIBRATION_HASH = {CalibrationModel: lambda model: model.key}
+
+@st.cache_data(ttl=SEQUENCE_TTL, max_entries=4096, show_spinner=False)
+def cached_sequence(uniprot_id):
+    # Network errors are raised, and so are never cached
+    return cleland_core.fetch_sequence(uniprot_id)
+
+@st.cache_data(max_entries=1024, show_spinner=False)
+def cached_summary(sequence):
+    return protein_summary(sequence)
+
+@st.cache_data(max_entries=256, show_spinner=False, hash_funcs=CALIBRATION_HASH)
+def cached_preview(molecular_mass, num_cysteines, calibration):
+    return rasterize_immunoblot(molecular_mass, num_cysteines, calibration)
+
+@st.cache_data(ttl=RENDER_TTL, max_entries=32, show_spinner=False, hash_funcs=CALIBRATION_HASH)
+def cached_png(molecular_mass, num_cysteines, calibration):
+    return render_immunoblot_png(molecular_mass, num_cysteines, calibration)
+
+@st.cache_data(ttl=SEQUENCE_TTL, max_entries=32)
+def cached_screen(accessions):
+    from batch_screen import screen_accessions
+
+    return screen_accessions(list(accessions))
+
+@st.cache_resource(max_entries=16)
+def parse_calibration(data):
+    return CalibrationModel.from_dict(json.loads(data))
 
 def fetch_protein_sequence(uniprot_id):
-    """Fetch protein sequence from UniProt"""
+    """Fetch protein sequence from the local store, falling back to UniProt"""
+    import requests
+
     try:
-        url = f"https://www.uniprot.org/uniprot/{uniprot_id}.fasta"
-        response = requests.get(url)
-        response.raise_for_status()
-        fasta = response.text
-        sequence = ''.join(fasta.split('\n')[1:]).replace(' ', '')
-        return sequence
+        sequence = cached_sequence(uniprot_id)
     except requests.RequestException as e:
         st.error(f"Failed to fetch data for UniProt ID {uniprot_id}: {e}")
         return None
+    if sequence is None:
+        st.error(f"No sequence found for UniProt ID {uniprot_id}")
+    return sequence
+
+def show_immunoblot(molecular_mass, num_cysteines, key='single'):
+    """Show a fast preview of the simulated immunoblot; the full figure is only drawn for download."""
+    calibration = st.session_state.get('calibration', DEFAULT_CALIBRATION)
+
+    # Display the preview (numpy raster, no matplotlib)
+    st.image(cached_preview(molecular_mass, num_cysteines, calibration), caption='Simulated Immunoblot (preview)')
+    st.caption(", ".join(f"{100 * (num_cysteines - i) / num_cysteines:.1f}%" for i in range(num_cysteines, -1, -1))
+               + " (top to bottom)")
+
+    # High-resolution figure, rendered on request
+    if st.checkbox("Prepare high-resolution download", key=f"prepare_{key}"):
+        st.download_button(
+            label="Download Immunoblot",
+            data=cached_png(molecular_mass, num_cysteines, calibration),
+            file_name="Simulated_Immunoblot.png",
+            mime="image/png",
+            key=f"download_{key}"
+        )
+
+def show_single_protein():
+    uniprot_id = st.text_input("Enter UniProt Accession Number:", "P04406").strip()
+
+    if uniprot_id:
+        sequence = fetch_protein_sequence(uniprot_id)
+        if sequence:
+            summary = cached_summary(sequence)
+            num_cysteines = summary['num_cysteines']
+
+            # 1. Number of bands is the cysteine residue count + 1
+            st.write(f"Number of Bands: {summary['num_bands']}")
+
+            # 2. Number of cysteine redox proteoforms (2^num_cysteines)
+            st.write(f"Number of Cysteine Redox Proteoforms: {summary['num_proteoforms']}")
+
+            # 3. Pascal triangle-based proteoform structure
+            st.write(f"Pascal-Based Proteoform Band Structure: {summary['pascal_row']}")
+
+            st.write(f"Protein Sequence Length: {summary['length']} amino acids")
+            st.write(f"Molecular Mass (Reduced Form): {summary['reduced_mass']:.2f} kDa")
+            st.write(f"Molecular Mass (100%-Oxidised Form): {summary['oxidised_mass']:.2f} kDa")
+            st.write(f"Number of Cysteines: {num_cysteines}")
+
+            # Cleland Immunoblot suitability
+            if summary['cleland_suitable']:
+                st.success("Yes, this protein is a good candidate for Cleland immunoblotting.")
+            else:
+                st.warning("No, this protein is not a good candidate for Cleland immunoblotting.")
+
+            if num_cysteines > 0:
+                show_immunoblot(summary['reduced_mass'], num_cysteines)
+
+def show_batch_screen():
+    from batch_screen import parse_accessions, read_accessions, results_to_csv
+
+    text = st.text_area("Enter UniProt Accession Numbers (one per line or comma separated):")
+    upload = st.file_uploader("...or upload a list of accessions", type=['txt', 'csv', 'tsv', 'xlsx'])
+
+    if st.button("Screen Accessions"):
+        accessions = parse_accessions(text)
+        if upload is not None:
+            accessions = list(dict.fromkeys(accessions + read_accessions(upload, filename=upload.name)))
+        if accessions:
+            with st.spinner(f"Screening {len(accessions)} accessions..."):
+                st.session_state['batch_results'] = cached_screen(tuple(accessions))
+        else:
+            st.warning("Please enter or upload at least one accession.")
+
+    results = st.session_state.get('batch_results')
+    if results is None:
+        return
+
+    suitable = int(results['Cleland Suitable'].fillna(False).sum())
+    st.write(f"{suitable} of {len(results)} proteins are good candidates for Cleland immunoblotting.")
+    # Formatted for display only, so the columns stay numeric (and sort as numbers)
+    display = results.style.format({
+        'Number of Proteoforms': lambda n: f"{n:.3g}" if n >= 1e15 else f"{n:.0f}",
+        'Pascal Row': lambda row: str(row) if isinstance(row, list) else '',
+    }, na_rep='')
+    st.dataframe(display, width='stretch')
+    st.download_button(
+        label="Download Results",
+        data=results_to_csv(results),
+        file_name="Cleland_screen.csv",
+        mime="text/csv"
+    )
+
+    # Simulated blots are only rendered on request
+    resolved = results[results['Status'] == 'ok']
+    resolved = resolved[resolved['Number of Cysteines'] > 0]
+    if len(resolved):
+        accession = st.selectbox("Simulate immunoblot for:", resolved['Accession'])
+        if st.button("Render Immunoblot"):
+            # Remembered across reruns, so the download controls below keep the blot on screen
+            st.session_state['rendered_accession'] = accession
+        if st.session_state.get('rendered_accession') == accession:
+            row = resolved[resolved['Accession'] == accession].iloc[0]
+            show_immunoblot(row['Reduced Mass (kDa)'], int(row['Number of Cysteines']), key=accession)
+
+def load_uploaded_calibration():
+    """Use a calibration JSON (from band_calibration / Band_calibrator.py) uploaded in the sidebar."""
+    upload = st.sidebar.file_uploader("Gel calibration (JSON)", type=['json'])
+    if upload is None:
+        st.session_state.pop('calibration', None)
+        return
+    try:
+        st.session_state['calibration'] = parse_calibration(upload.getvalue())
+    except (ValueError, KeyError) as e:
+        st.sidebar.error(f"Could not read calibration: {e}")
 
-def calculate_molecular_mass(sequence):
-    """Calculate molecular mass of the protein based on the sequence."""
-    avg_residue_mass = 0.110  # kDa (110 Da)
-    molecular_mass = len(sequence) * avg_residue_mass
-    return molecular_mass
-
-def generate_proteoforms(num_cysteines):
-    """Generate all unique proteoforms and group them by oxidation state."""
-    proteoforms = []
-    grouped_proteoforms = [[] for _ in range(num_cysteines + 1)]
-    
-    for i in range(num_cysteines + 1):
-        for combi in combinations(range(num_cysteines), i):
-            proteoform = np.zeros(num_cysteines, dtype=int)
-            proteoform[list(combi)] = 1
-            proteoforms.append(proteoform)
-            grouped_proteoforms[i].append(proteoform)
-    
-    return proteoforms, grouped_proteoforms
-
-def calculate_pascal_row(num_cysteines):
-    """Generate the Pascal triangle row for the given number of cysteines."""
-    return [int(comb(num_cysteines, k)) for k in range(num_cysteines + 1)]
-
-def predict_band_position(molecular_weight, coefficients):
-    """Predict the position of the band using the scaling formula from the standard curve."""
-    log_mw = np.log10(molecular_weight)
-    pixel_position = np.polyval(coefficients, log_mw)
-    return pixel_position
-
-def plot_immunoblot(molecular_mass, grouped_proteoforms, num_cysteines, coefficients):
-    """Plot the positions of the redox proteoforms on a scale-invariant simulated immunoblot."""
-    
-    # Calculate band positions using molecular weights
-    band_positions = [molecular_mass + (5 * i) for i in range(len(grouped_proteoforms))]
-    
-    fig, ax = plt.subplots(figsize=(5, 8))
-
-    # Plot the redox proteoforms at their corresponding molecular weights
-    for i, pos in enumerate(band_positions):
-        y_pos = predict_band_position(pos, coefficients)  # Position the band using the scaling
-        band_intensity = (num_cysteines - i + 1) / (num_cysteines + 1)  # Intensity decreases with oxidation
-        ax.plot([0.3, 0.7], [y_pos, y_pos], linewidth=10 * band_intensity, color='black')
-        ax.text(0.75, y_pos, f'{(100 * (num_cysteines - i) / num_cysteines):.1f}%', verticalalignment='center', fontsize=12)
-
-    # Set fixed y-axis limits (scale invariant)
-    ax.set_ylim(predict_band_position(250, coefficients), predict_band_position(10, coefficients))
-    
-    ax.set_xlim(0, 1)
-    ax.set_yticks([predict_band_position(mw, coefficients) for mw in [10, 25, 37, 50, 75, 100, 150, 250]])
-    ax.set_yticklabels([f'{mw:.0f} kDa' for mw in [10, 25, 37, 50, 75, 100, 150, 250]])
-    ax.set_xticks([])
-    ax.set_xlabel('Protein Redox States', fontsize=15)
-    ax.set_ylabel('Molecular Mass (kDa)', fontsize=15)
-    ax.set_title('Simulated Immunoblot', fontsize=20)
-
-    # Invert the y-axis to match the appearance of a real blot
-    ax.invert_yaxis()
-
-    plt.tight_layout()
-
-    buf = BytesIO()
-    plt.savefig(buf, format='png', dpi=300)
-    buf.seek(0)
-    return buf
+# Standard curve used when no gel calibration is uploaded
+DEFAULT_CALIBRATION = CalibrationModel.from_coefficients([-0.00501309, 2.38407094])
 
 # Streamlit app
 st.title('Cysteine Redox Proteoforms Immunoblot Simulation')
 
-uniprot_id = st.text_input("Enter UniProt Accession Number:", "P04406")
-
-if uniprot_id:
-    sequence = fetch_protein_sequence(uniprot_id)
-    if sequence:
-        num_cysteines = sequence.count('C')  # Count the number of cysteines
-        molecular_mass = calculate_molecular_mass(sequence)
-        
-        # Calculate the molecular mass of the 100%-oxidised form
-        oxidised_mass = molecular_mass + (num_cysteines * 5)
-
-        # 1. Number of bands is the cysteine residue count + 1
-        num_bands = num_cysteines + 1
-        st.write(f"Number of Bands: {num_bands}")
-        
-        # 2. Number of cysteine redox proteoforms (2^num_cysteines)
-        num_proteoforms = 2 ** num_cysteines
-        st.write(f"Number of Cysteine Redox Proteoforms: {num_proteoforms}")
-
-        # 3. Pascal triangle-based proteoform structure
-        pascal_row = calculate_pascal_row(num_cysteines)
-        st.write(f"Pascal-Based Proteoform Band Structure: {pascal_row}")
-
-        st.write(f"Protein Sequence Length: {len(sequence)} amino acids")
-        st.write(f"Molecular Mass (Reduced Form): {molecular_mass:.2f} kDa")
-        st.write(f"Molecular Mass (100%-Oxidised Form): {oxidised_mass:.2f} kDa")
-        st.write(f"Number of Cysteines: {num_cysteines}")
-
-        # Cleland Immunoblot suitability
-        if oxidised_mass < 152:
-            st.success("Yes, this protein is a good candidate for Cleland immunoblotting.")
-        else:
-            st.warning("No, this protein is not a good candidate for Cleland immunoblotting.")
-
-        if num_cysteines > 0:
-            # Coefficients from the standard curve
-            coefficients = [-0.00501309, 2.38407094]  # Replace with real coefficients
-            _, grouped_proteoforms = generate_proteoforms(num_cysteines)
-            buf = plot_immunoblot(molecular_mass, grouped_proteoforms, num_cysteines, coefficients)
-
-            if buf:
-                # Display the plot
-                st.image(buf, use_column_width=True, caption='Simulated Immunoblot')
-
-                # Download button
-                buf.seek(0)
-                st.download_button(
-                    label="Download Immunoblot",
-                    data=buf,
-                    file_name="Simulated_Immunoblot.png",
-                    mime="image/png"
-                )
+load_uploaded_calibration()
+
+mode = st.sidebar.radio("Mode", ["Single protein", "Batch screen"])
+
+if mode == "Single protein":
+    show_single_protein()
+else:
+    show_batch_screen()
@@ -1,38 +1,48 @@
-import matplotlib.pyplot as plt
 import numpy as np
+from matplotlib.figure import Figure
 
-# Function to generate Pascal's triangle up to n rows
+from binomial import log_pascal_triangle, pascal_triangle
+
+# Triangles with up to this many rows are drawn number by number; larger ones as a heatmap
+MAX_TEXT_ROWS = 16
+
+# Function to generate Pascal's triangle up to n rows (exact integers)
 def generate_pascals_triangle(n):
-    triangle = [[1]]
-    for i in range(1, n):
-        row = [1]
-        for j in range(1, i):
-            row.append(triangle[i-1][j-1] + triangle[i-1][j])
-        row.append(1)
-        triangle.append(row)
-    return triangle
+    return pascal_triangle(n)
+
+# log10 C(i, j) laid out as the triangle: row i, entry j spans columns (n - 1 - i) + 2j and the next one
+def triangle_image(num_rows):
+    values = log_pascal_triangle(num_rows) / np.log(10)
+    image = np.full((num_rows, 2 * num_rows), np.nan)
+    i, j = np.nonzero(~np.isnan(values))
+    columns = num_rows - 1 - i + 2 * j
+    image[i, columns] = values[i, j]
+    image[i, columns + 1] = values[i, j]
+    return image
 
 # Function to plot Pascal's triangle
-def plot_pascals_triangle(triangle):
-    fig, ax = plt.subplots()
+def plot_pascals_triangle(num_rows, output_path="pascals_triangle.png", dpi=300):
+    fig = Figure()
+    ax = fig.subplots()
     ax.axis('off')  # Turn off the axis
 
-    # Create a grid of numbers in Pascal's triangle
-    max_rows = len(triangle)
-    for i, row in enumerate(triangle):
-        for j, num in enumerate(row):
-            ax.text(j - i / 2, -i, str(num), ha='center', va='center')
-
-    ax.set_aspect('equal')
-    plt.xlim(-max_rows // 2, max_rows // 2)
-    plt.ylim(-max_rows, 0)
+    if num_rows <= MAX_TEXT_ROWS:
+        # Create a grid of numbers in Pascal's triangle
+        for i, row in enumerate(generate_pascals_triangle(num_rows)):
+            for j, num in enumerate(row):
+                ax.text(j - i / 2, -i, str(num), ha='center', va='center')
+        ax.set_aspect('equal')
+        ax.set_xlim(-num_rows // 2, num_rows // 2)
+        ax.set_ylim(-num_rows, 0)
+    else:
+        # Too many entries to print: one image, coloured by the size of each coefficient
+        heatmap = ax.imshow(triangle_image(num_rows), cmap='viridis', interpolation='nearest', aspect='auto')
+        fig.colorbar(heatmap, ax=ax, label='log10 C(n, k)')
+        ax.set_title(f"Pascal's triangle, rows 0-{num_rows - 1}")
 
     # Save the image at 300 DPI
-    plt.savefig("pascals_triangle.png", dpi=300, bbox_inches='tight')
-    plt.show()
-
-# Generate Pascal's triangle with 11 rows
-pascals_triangle = generate_pascals_triangle(11)
+    fig.savefig(output_path, dpi=dpi, bbox_inches='tight')
 
-# Plot and export the triangle
-plot_pascals_triangle(pascals_triangle)
+if __name__ == '__main__':
+    # Generate Pascal's triangle with 11 rows, then plot and export it
+    plot_pascals_triangle(11)
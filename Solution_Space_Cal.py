@@ -1,5 +1,4 @@
-import math
-import pandas as pd
+from solution_space import find_molecule_count_for_M
 
 # Target large number M
 M = 2.90e16
@@ -20,34 +19,14 @@ proteoforms = {
 }
 num_proteoforms = len(proteoforms)
 
-# Function to estimate the solution space size using combinatorics
-def estimate_solution_space_size(num_molecules, num_proteoforms):
-    return math.comb(num_molecules + num_proteoforms - 1, num_proteoforms - 1)
+if __name__ == '__main__':
+    # Find the number of molecules for which the solution space size reaches M, with the table of sizes
+    molecule_count, solution_space_size, df_results = find_molecule_count_for_M(M, num_proteoforms, table=True)
 
-# Now, let's find the number of molecules where the solution space size is close to M
-def find_molecule_count_for_M(M, num_proteoforms):
-    num_molecules = 1
-    results = []  # List to store the results
-    while True:
-        solution_space_size = estimate_solution_space_size(num_molecules, num_proteoforms)
-        print(f"With {num_molecules} molecules: Solution space size = {solution_space_size}")
-        
-        # Append the current molecule count and solution space size to the results list
-        results.append({"Molecule Count": num_molecules, "Solution Space Size": solution_space_size})
-        
-        if solution_space_size >= M:
-            return num_molecules, solution_space_size, results
-        
-        num_molecules += 1
+    print(f"Number of molecules required for solution space size to reach or exceed M: {molecule_count}")
+    print(f"Calculated solution space size: {solution_space_size}")
 
-# Run the function to find the number of molecules for which the solution space size is close to M
-molecule_count, solution_space_size, results = find_molecule_count_for_M(M, num_proteoforms)
+    # Save the results to a CSV file
+    df_results.to_csv('solution_space_size_results.csv', index=False)
 
-print(f"\nNumber of molecules required for solution space size to reach or exceed M: {molecule_count}")
-print(f"Calculated solution space size: {solution_space_size}")
-
-# Save the results to a CSV file
-df_results = pd.DataFrame(results)
-df_results.to_csv('solution_space_size_results.csv', index=False)
-
-print("Results saved to 'solution_space_size_results.csv'")
+    print("Results saved to 'solution_space_size_results.csv'")
@@ -0,0 +1,260 @@
+import argparse
+import glob
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from itertools import combinations
+
+import numpy as np
+
+from blot_io import DEFAULT_STRIP_ROWS, column_profile, lane_profiles, open_scan, scan_statistics
+from calibration import CalibrationModel, as_calibration, load_calibration
+
+# Molecular weights (kDa) of the marker ladder, from the top of the gel down
+MARKER_LADDER_KDA = (250, 150, 100, 75, 50, 37, 25, 20, 15)
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.tif', '.tiff', '.bmp', '.npy')
+
+
+def band_signal(profile, stats):
+    """Rescale an intensity profile so bands are bright, whatever the polarity of the scan.
+
+    stats comes from blot_io.scan_statistics. Blots are mostly background, so
+    a median above mid-range means dark bands on a light background.
+    """
+    if stats['median'] > (stats['min'] + stats['max']) / 2:
+        return stats['max'] - profile
+    return profile - stats['min']
+
+
+def _smooth(profile, width):
+    if width <= 1:
+        return profile
+    kernel = np.ones(width) / width
+    return np.convolve(profile, kernel, mode='same')
+
+
+def find_lanes(column_signal, min_width=5, smoothing=5):
+    """Find lanes as runs of columns whose mean signal stands out from the background.
+
+    Returns a list of (x_start, x_stop) column ranges, left to right.
+    """
+    columns = _smooth(column_signal, smoothing)
+    low, high = np.percentile(columns, [10, 99])
+    above = columns > low + 0.25 * (high - low)
+    edges = np.flatnonzero(np.diff(np.concatenate(([0], above.astype(np.int8), [0]))))
+    return [(int(start), int(stop)) for start, stop in zip(edges[::2], edges[1::2]) if stop - start >= min_width]
+
+
+def detect_peaks(profile, max_peaks, min_prominence=0.05, min_distance=3):
+    """Return row positions of up to max_peaks of the most prominent peaks, top to bottom."""
+    from scipy.signal import find_peaks
+
+    span = profile.max() - profile.min()
+    if span <= 0:
+        return np.array([], dtype=int)
+    peaks, properties = find_peaks(profile, prominence=min_prominence * span, distance=min_distance)
+    strongest = np.argsort(properties['prominences'])[::-1][:max_peaks]
+    return np.sort(peaks[strongest])
+
+
+def fit_calibration(pixel_positions, molecular_weights):
+    """Fit log10(MW) against pixel position, robust to a stray peak.
+
+    Uses the Theil-Sen estimator and returns np.polyfit-style (slope,
+    intercept) coefficients together with fit-quality metrics.
+    """
+    from scipy.stats import theilslopes
+
+    pixels = np.asarray(pixel_positions, dtype=np.float64)
+    log_mw = np.log10(np.asarray(molecular_weights, dtype=np.float64))
+    slope, intercept, _, _ = theilslopes(log_mw, pixels)
+    residuals = log_mw - (slope * pixels + intercept)
+    total = np.sum((log_mw - log_mw.mean()) ** 2)
+    return np.array([slope, intercept]), {
+        'r_squared': float(1 - np.sum(residuals ** 2) / total) if total > 0 else float('nan'),
+        'rmse_log10': float(np.sqrt(np.mean(residuals ** 2))),
+        'max_mw_error_percent': float(np.max(np.abs(10 ** np.abs(residuals) - 1)) * 100),
+    }
+
+
+def assign_ladder(peaks, ladder=MARKER_LADDER_KDA):
+    """Match detected peaks (top to bottom) to ladder bands, preserving their order.
+
+    When fewer peaks than ladder bands are found, every order-preserving subset
+    of the ladder is tried and the one giving the most linear standard curve
+    is kept. Returns (molecular_weights, coefficients, metrics).
+    """
+    ladder = sorted(ladder, reverse=True)
+    if len(peaks) < 2:
+        raise ValueError(f"Found {len(peaks)} marker peaks; at least 2 are needed for a calibration")
+    if len(peaks) > len(ladder):
+        raise ValueError(f"Found {len(peaks)} marker peaks for a {len(ladder)}-band ladder")
+
+    best = None
+    for subset in combinations(ladder, len(peaks)):
+        coefficients, metrics = fit_calibration(peaks, subset)
+        # Marker bands must run from high to low molecular weight down the gel
+        if coefficients[0] >= 0:
+            continue
+        if best is None or metrics['rmse_log10'] < best[2]['rmse_log10']:
+            best = (list(subset), coefficients, metrics)
+    if best is None:
+        raise ValueError("Marker peaks do not give a decreasing standard curve")
+    return best
+
+
+def choose_marker_lane(profiles, ladder=MARKER_LADDER_KDA, **peak_options):
+    """Index of the lane profile whose peak count best matches the ladder (leftmost on ties)."""
+    scores = [abs(len(detect_peaks(profile, len(ladder), **peak_options)) - len(ladder)) for profile in profiles]
+    return int(np.argmin(scores))
+
+
+def calibrate_image(image_path, marker_lane='auto', ladder=MARKER_LADDER_KDA, kind='linear',
+                    strip_rows=DEFAULT_STRIP_ROWS, **peak_options):
+    """Detect the marker bands in a gel image and fit the standard curve.
+
+    marker_lane is 'auto', 'left', 'right', or an (x_start, x_stop) column
+    range, and kind the calibration.CalibrationModel kind to store. The scan
+    is read at full bit depth in strips of strip_rows rows. Returns a
+    JSON-serialisable dict with the coefficients, the detected peaks and the
+    ladder bands they were assigned to, fit metrics, and the model.
+    """
+    image = open_scan(image_path)
+    stats = scan_statistics(image, strip_rows)
+    if isinstance(marker_lane, str):
+        lanes = find_lanes(band_signal(column_profile(image, strip_rows), stats))
+        if not lanes:
+            raise ValueError(f"No lanes found in {image_path}")
+        if marker_lane == 'left':
+            lanes = lanes[:1]
+        elif marker_lane == 'right':
+            lanes = lanes[-1:]
+    else:
+        lanes = [tuple(marker_lane)]
+
+    profiles = band_signal(lane_profiles(image, lanes, strip_rows), stats)
+    best = choose_marker_lane(profiles, ladder, **peak_options)
+    lane = lanes[best]
+    peaks = detect_peaks(profiles[best], len(ladder), **peak_options)
+    molecular_weights, coefficients, metrics = assign_ladder(peaks, ladder)
+    return {
+        'image': os.path.basename(image_path),
+        'marker_lane': [int(lane[0]), int(lane[1])],
+        'pixel_positions': [int(peak) for peak in peaks],
+        'molecular_weights': [float(mw) for mw in molecular_weights],
+        'coefficients': [float(c) for c in coefficients],
+        **metrics,
+        'model': CalibrationModel.fit(peaks, molecular_weights, kind, coefficients).to_dict(),
+    }
+
+
+def predict_molecular_weight(pixel_pos, calibration):
+    """Molecular weight (kDa) at a pixel position, from (slope, intercept) coefficients or a CalibrationModel."""
+    return as_calibration(calibration).pixel_to_mw(pixel_pos)
+
+
+def get_calibration(image_path, cache_dir, **options):
+    """Calibration model for a scan, fitted once and then reused from <cache_dir>/<image>_calibration.json.
+
+    The cached fit is redone if the scan is newer than it.
+    """
+    stem = os.path.splitext(os.path.basename(image_path))[0]
+    cache_path = os.path.join(cache_dir, f'{stem}_calibration.json')
+    if os.path.exists(cache_path) and os.path.getmtime(cache_path) >= os.path.getmtime(image_path):
+        return load_calibration(cache_path)
+    result = calibrate_image(image_path, **options)
+    os.makedirs(cache_dir, exist_ok=True)
+    with open(cache_path, 'w') as handle:
+        json.dump(result, handle, indent=2)
+    return CalibrationModel.from_dict(result)
+
+
+def plot_standard_curve(result, output_path):
+    """Save the standard curve plot (log(MW) vs pixel position) without opening a window."""
+    from matplotlib.figure import Figure
+
+    pixels = np.array(result['pixel_positions'])
+    model = CalibrationModel.from_dict(result)
+    curve = np.linspace(pixels.min(), pixels.max(), 200)
+    fig = Figure(figsize=(8, 6))
+    ax = fig.subplots()
+    ax.scatter(pixels, np.log10(result['molecular_weights']), color='blue', label='Marker Bands')
+    ax.plot(curve, model.log_mw_at(curve), color='black', label='Fit')
+    ax.set_title('Standard Curve: log(MW) vs Pixel Position')
+    ax.set_xlabel('Pixel Position')
+    ax.set_ylabel('log(Molecular Weight)')
+    ax.grid(True)
+    ax.legend()
+    fig.savefig(output_path)
+
+
+def _calibrate_to_file(job):
+    image_path, output_dir, options = job
+    stem = os.path.splitext(os.path.basename(image_path))[0]
+    try:
+        result = calibrate_image(image_path, **options)
+        result['status'] = 'ok'
+    except Exception as e:
+        # One bad scan should not stop the batch
+        result = {'image': os.path.basename(image_path), 'status': f'error: {e}'}
+    with open(os.path.join(output_dir, f'{stem}_calibration.json'), 'w') as handle:
+        json.dump(result, handle, indent=2)
+    return result
+
+
+def calibrate_directory(input_dir, output_dir, processes=None, **options):
+    """Calibrate every gel image in a directory in a process pool.
+
+    Writes <image>_calibration.json per image and calibration_summary.csv with
+    the coefficients and fit metrics of all images. Returns the summary
+    DataFrame.
+    """
+    import pandas as pd
+
+    os.makedirs(output_dir, exist_ok=True)
+    image_paths = sorted(
+        path for path in glob.glob(os.path.join(input_dir, '*'))
+        if path.lower().endswith(IMAGE_EXTENSIONS)
+    )
+    jobs = [(path, output_dir, options) for path in image_paths]
+    with ProcessPoolExecutor(max_workers=processes) as executor:
+        results = list(executor.map(_calibrate_to_file, jobs))
+
+    columns = ['image', 'status', 'slope', 'intercept', 'num_markers', 'r_squared', 'rmse_log10',
+               'max_mw_error_percent']
+    summary = pd.DataFrame([{
+        'image': result['image'],
+        'status': result['status'],
+        'slope': result.get('coefficients', [np.nan, np.nan])[0],
+        'intercept': result.get('coefficients', [np.nan, np.nan])[1],
+        'num_markers': len(result.get('pixel_positions', [])),
+        'r_squared': result.get('r_squared', np.nan),
+        'rmse_log10': result.get('rmse_log10', np.nan),
+        'max_mw_error_percent': result.get('max_mw_error_percent', np.nan),
+    } for result in results], columns=columns)
+    summary.to_csv(os.path.join(output_dir, 'calibration_summary.csv'), index=False)
+    return summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Automatically calibrate gel images from their marker ladder.')
+    parser.add_argument('input_dir', help='Directory of gel images')
+    parser.add_argument('output_dir', help='Directory for the calibration files')
+    parser.add_argument('--marker-lane', default='auto', help="'auto', 'left' or 'right'")
+    parser.add_argument('--ladder', default=','.join(map(str, MARKER_LADDER_KDA)),
+                        help='Comma-separated marker molecular weights (kDa)')
+    parser.add_argument('--kind', default='linear', choices=['linear', 'piecewise', 'spline'],
+                        help='Calibration model stored with each fit')
+    parser.add_argument('--processes', type=int, default=None, help='Worker processes (default: all cores)')
+    args = parser.parse_args(argv)
+
+    ladder = tuple(float(mw) for mw in args.ladder.split(','))
+    summary = calibrate_directory(args.input_dir, args.output_dir, processes=args.processes,
+                                  marker_lane=args.marker_lane, ladder=ladder, kind=args.kind)
+    print(f"Calibrated {int((summary['status'] == 'ok').sum())} of {len(summary)} images; "
+          f"results saved to: {args.output_dir}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,135 @@
+import argparse
+import io
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+from cleland_core import CLELAND_MAX_OXIDISED_MASS, PEG_MASS_KDA
+from mass_engine import sequence_masses
+from proteoform_model import band_sizes, num_proteoforms
+from sequence_store import get_default_provider
+
+RESULT_COLUMNS = [
+    'Accession',
+    'Status',
+    'Sequence Length',
+    'Number of Cysteines',
+    'Number of Bands',
+    'Number of Proteoforms',
+    'Pascal Row',
+    'Reduced Mass (kDa)',
+    'Oxidised Mass (kDa)',
+    'Cleland Suitable',
+]
+
+
+def parse_accessions(text):
+    """Split free text (one per line, or comma/space separated) into unique accessions, keeping order."""
+    accessions = [token.strip().upper() for token in re.split(r'[\s,;]+', text) if token.strip()]
+    return list(dict.fromkeys(accessions))
+
+
+def read_accessions(source, filename=None):
+    """Read accessions from a .txt/.csv/.xlsx path or file-like object.
+
+    Tables use their 'Accession' column if present, otherwise the first column.
+    """
+    name = filename or (source if isinstance(source, str) else getattr(source, 'name', ''))
+    extension = os.path.splitext(str(name))[1].lower()
+    if extension in ('.csv', '.tsv', '.xlsx', '.xls'):
+        if extension in ('.xlsx', '.xls'):
+            table = pd.read_excel(source)
+        else:
+            table = pd.read_csv(source, sep='\t' if extension == '.tsv' else ',')
+        column = 'Accession' if 'Accession' in table.columns else table.columns[0]
+        return parse_accessions(' '.join(table[column].dropna().astype(str)))
+
+    if isinstance(source, str):
+        with open(source, 'r') as handle:
+            return parse_accessions(handle.read())
+    text = source.read()
+    return parse_accessions(text.decode() if isinstance(text, bytes) else text)
+
+
+def _fetch(provider, accession):
+    try:
+        sequence = provider.get(accession)
+    except Exception as e:
+        return None, f'error: {e}'
+    return sequence, 'ok' if sequence else 'not found'
+
+
+def screen_accessions(accessions, provider=None, max_workers=16):
+    """Resolve sequences concurrently and compute Cleland immunoblot statistics for each accession.
+
+    Returns a DataFrame with one row per accession (see RESULT_COLUMNS).
+    Accessions that could not be resolved are kept, with their Status set.
+    """
+    provider = provider or get_default_provider()
+    accessions = list(accessions)
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        fetched = list(executor.map(lambda accession: _fetch(provider, accession), accessions))
+
+    found = [i for i, (sequence, _) in enumerate(fetched) if sequence]
+    sequences = [fetched[i][0] for i in found]
+    masses = sequence_masses(sequences)
+    cysteines = masses['cysteines']
+    oxidised = masses['average_mass'] + cysteines * PEG_MASS_KDA
+
+    def column(values, dtype):
+        # Every row at once, missing (<NA>/NaN) where no sequence was found, so each column keeps its dtype
+        filled = pd.Series([None] * len(accessions), dtype=dtype)
+        filled.iloc[found] = list(values)
+        return filled
+
+    pascal_rows = [None] * len(accessions)
+    for i, n in zip(found, cysteines):
+        pascal_rows[i] = band_sizes(int(n))
+
+    return pd.DataFrame({
+        'Accession': accessions,
+        'Status': [status for _, status in fetched],
+        'Sequence Length': column(map(len, sequences), 'Int64'),
+        'Number of Cysteines': column(cysteines, 'Int64'),
+        'Number of Bands': column(cysteines + 1, 'Int64'),
+        # 2^n outgrows int64 beyond 62 cysteines, but powers of two are exact in float64
+        'Number of Proteoforms': column((float(num_proteoforms(int(n))) for n in cysteines), 'float64'),
+        'Pascal Row': pd.Series(pascal_rows, dtype=object),
+        'Reduced Mass (kDa)': column(masses['average_mass'], 'float64'),
+        'Oxidised Mass (kDa)': column(oxidised, 'float64'),
+        'Cleland Suitable': column(oxidised < CLELAND_MAX_OXIDISED_MASS, 'boolean'),
+    }, columns=RESULT_COLUMNS)
+
+
+def results_to_csv(results):
+    """Serialise screening results to CSV text (proteoform counts as integers, Pascal rows space-separated)."""
+    export = results.copy()
+    export['Number of Proteoforms'] = export['Number of Proteoforms'].map(
+        lambda n: '' if pd.isna(n) else str(int(n))
+    )
+    export['Pascal Row'] = export['Pascal Row'].map(
+        lambda row: ' '.join(map(str, row)) if isinstance(row, list) else ''
+    )
+    buffer = io.StringIO()
+    export.to_csv(buffer, index=False)
+    return buffer.getvalue()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Screen a list of UniProt accessions for Cleland immunoblot suitability.')
+    parser.add_argument('accessions', help='File of accessions (.txt, .csv or .xlsx)')
+    parser.add_argument('output', help='CSV file to write the results to')
+    parser.add_argument('--workers', type=int, default=16, help='Concurrent sequence lookups')
+    args = parser.parse_args(argv)
+
+    results = screen_accessions(read_accessions(args.accessions), max_workers=args.workers)
+    with open(args.output, 'w') as handle:
+        handle.write(results_to_csv(results))
+    print(f"Screened {len(results)} accessions ({int(results['Cleland Suitable'].fillna(False).sum())} suitable); "
+          f"results saved to: {args.output}")
+
+
+if __name__ == '__main__':
+    main()
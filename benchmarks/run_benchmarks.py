@@ -0,0 +1,282 @@
+# Timing and profiling harness for the hot paths of the Cleland scripts.
+#
+# Every benchmark runs at several input sizes on synthetic data generated
+# locally (FASTA, gel scans, PDB structures), so scaling curves can be tracked
+# across versions. Results are appended as JSON lines tagged with the git
+# commit:
+#
+#     python benchmarks/run_benchmarks.py                     # all benchmarks, all sizes
+#     python benchmarks/run_benchmarks.py --quick -k peg      # smallest size, names containing 'peg'
+#     python benchmarks/run_benchmarks.py --profile -k calibrate
+#     python benchmarks/run_benchmarks.py --compare benchmarks/results.jsonl
+import argparse
+import cProfile
+import io
+import json
+import os
+import platform
+import pstats
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+import numpy as np  # noqa: E402
+
+from benchmarks import synthetic  # noqa: E402
+
+DEFAULT_RESULTS = os.path.join(ROOT, 'benchmarks', 'results.jsonl')
+
+
+# Each setup_* function builds the inputs for one size in workdir and returns the callable to time.
+
+def setup_sequence_masses(size, workdir):
+    from mass_engine import sequence_masses
+
+    sequences = synthetic.random_sequences(size)
+    return lambda: sequence_masses(sequences)
+
+
+def setup_build_mass_table(size, workdir):
+    from proteome_masses import build_mass_table
+
+    fasta = synthetic.write_fasta(os.path.join(workdir, f'proteins_{size}.fasta.gz'), size)
+    output = os.path.join(workdir, f'masses_{size}.parquet')
+    return lambda: build_mass_table(fasta, output, processes=2)
+
+
+def setup_sequence_lookup(size, workdir):
+    from sequence_store import SequenceProvider, build_sequence_index
+
+    sequences = {f'SYN{i:06d}': sequence for i, sequence in enumerate(synthetic.random_sequences(size))}
+    # Half the accessions are in a temporary index, the rest only on a local stand-in for UniProt
+    fasta = os.path.join(workdir, f'lookup_{size}.fasta')
+    with open(fasta, 'w') as handle:
+        for accession in list(sequences)[:size // 2]:
+            handle.write(f">sp|{accession}|{accession}_HUMAN\n{sequences[accession]}\n")
+    db = os.path.join(workdir, f'lookup_{size}.db')
+    build_sequence_index(fasta, db)
+    server = synthetic.serve_sequences(sequences)
+    base_url = f'http://127.0.0.1:{server.server_port}'
+
+    def lookup():
+        # A fresh provider each time, so no lookup is served from its in-process cache
+        provider = SequenceProvider(db, base_url=base_url)
+        try:
+            for accession, sequence in sequences.items():
+                if provider.get(accession) != sequence:
+                    raise AssertionError(f"Wrong sequence returned for {accession}")
+            if provider.get('MISSING') is not None:
+                raise AssertionError("Unknown accession was not reported as missing")
+        finally:
+            provider.close()
+
+    return lookup
+
+
+def setup_proteome_analysis(size, workdir):
+    from mass_engine import sequence_masses
+    from proteome_analysis import analyse_masses
+
+    # Mass arrays are tiled from a smaller proteome so large sizes set up quickly
+    masses = sequence_masses(synthetic.random_sequences(min(size, 20000)))
+    repeats = -(-size // len(masses['cysteines']))
+    cysteines = np.tile(masses['cysteines'], repeats)[:size]
+    reduced = np.tile(masses['average_mass'], repeats)[:size]
+    oxidised = reduced + 5 * cysteines
+    return lambda: analyse_masses(cysteines, reduced, oxidised, cutoffs=(100, 150, 200, 250))
+
+
+def setup_proteoform_matrix(size, workdir):
+    from proteoform_map import proteoform_matrix
+
+    return lambda: proteoform_matrix(size)
+
+
+def setup_count_solutions(size, workdir):
+    from oxidation_solver import count_solutions
+
+    return lambda: count_solutions([0, 20, 40, 60, 80, 100], size, 20)
+
+
+def setup_molecule_count_search(size, workdir):
+    from solution_space import find_molecule_count_for_M
+
+    return lambda: find_molecule_count_for_M(10.0 ** size, 11)
+
+
+def setup_pascal_row(size, workdir):
+    from binomial import pascal_row
+
+    # Bypass the memo so every call does the work
+    return lambda: pascal_row.__wrapped__(size)
+
+
+def setup_calibrate_image(size, workdir):
+    from band_calibration import calibrate_image
+
+    path = os.path.join(workdir, f'gel_{size}.npy')
+    synthetic.write_gel(path, rows=size)
+    return lambda: calibrate_image(path)
+
+
+def setup_quantify_gel(size, workdir):
+    from densitometry import quantify_gel
+
+    path = os.path.join(workdir, f'gel_{size}.npy')
+    info = synthetic.write_gel(path, rows=size)
+    lanes = [{key: sample[key] for key in ('lane', 'reduced_mass', 'num_cysteines')} for sample in info['samples']]
+    return lambda: quantify_gel(path, info['coefficients'], lanes)
+
+
+def setup_blot_preview(size, workdir):
+    from blot_render import rasterize_immunoblot
+    from calibration import CalibrationModel
+
+    calibration = CalibrationModel.from_coefficients([-0.00501309, 2.38407094])
+    return lambda: rasterize_immunoblot(36.0, 10, calibration, height=size, width=size // 2)
+
+
+def setup_blot_png(size, workdir):
+    from blot_render import _render_png
+    from calibration import CalibrationModel
+
+    calibration = CalibrationModel.from_coefficients([-0.00501309, 2.38407094])
+    # The uncached renderer: what a cache miss costs
+    return lambda: _render_png.__wrapped__(36.0, 10, calibration, size)
+
+
+def setup_peg_placement(size, workdir):
+    from peg_placement import load_peg_template, place_pegs
+
+    structure = synthetic.make_protein_structure(num_residues=10 * size, cysteine_every=10)
+    template = load_peg_template(synthetic.write_peg_pdb(os.path.join(workdir, 'peg.pdb')))
+    return lambda: place_pegs(structure, template)
+
+
+def setup_occupancy_simulation(size, workdir):
+    from occupancy_simulator import simulate_occupancy, site_probabilities
+
+    probabilities = site_probabilities(site_percentages=np.linspace(5, 95, 10))
+    return lambda: simulate_occupancy(probabilities, size, seed=0, method='explicit')
+
+
+# name: (sizes, setup, what the size means)
+BENCHMARKS = {
+    'sequence_masses': ((1000, 10000, 100000), setup_sequence_masses, 'proteins'),
+    'build_mass_table': ((5000, 50000), setup_build_mass_table, 'proteins'),
+    'sequence_lookup': ((100, 1000), setup_sequence_lookup, 'accessions'),
+    'proteome_analysis': ((10 ** 4, 10 ** 5, 10 ** 6), setup_proteome_analysis, 'proteins'),
+    'proteoform_matrix': ((12, 16, 20), setup_proteoform_matrix, 'cysteines'),
+    'count_solutions': ((10, 100, 1000), setup_count_solutions, 'molecules'),
+    'molecule_count_search': ((6, 16, 100), setup_molecule_count_search, 'log10 M'),
+    'pascal_row': ((100, 1000, 10000), setup_pascal_row, 'n'),
+    'calibrate_image': ((512, 2048, 8192), setup_calibrate_image, 'gel rows'),
+    'quantify_gel': ((512, 2048, 8192), setup_quantify_gel, 'gel rows'),
+    'blot_preview': ((480, 1920), setup_blot_preview, 'pixels high'),
+    'blot_png': ((100, 300), setup_blot_png, 'dpi'),
+    'peg_placement': ((10, 40, 100), setup_peg_placement, 'cysteines'),
+    'occupancy_simulation': ((10 ** 5, 10 ** 6, 10 ** 7), setup_occupancy_simulation, 'molecules'),
+}
+
+
+def time_callable(function, min_time=0.5, max_repeats=20):
+    """Run function repeatedly (at least twice, until min_time has passed) and return the timings in seconds.
+
+    One untimed warm-up call comes first, so lazy imports and caches do not count.
+    """
+    function()
+    timings = []
+    while len(timings) < 2 or (sum(timings) < min_time and len(timings) < max_repeats):
+        start = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def profile_callable(function, output_path, limit=15):
+    """Profile one call with cProfile, save the stats and return the top entries by cumulative time."""
+    profiler = cProfile.Profile()
+    profiler.runcall(function)
+    profiler.dump_stats(output_path)
+    report = io.StringIO()
+    pstats.Stats(profiler, stream=report).sort_stats('cumulative').print_stats(limit)
+    return report.getvalue()
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_benchmarks(names=None, quick=False, profile_dir=None, min_time=0.5):
+    """Run the selected benchmarks at each size; yields one result dict per (benchmark, size)."""
+    context = {'commit': git_commit(), 'python': platform.python_version(), 'numpy': np.__version__,
+               'machine': platform.machine(), 'cpus': os.cpu_count()}
+    with tempfile.TemporaryDirectory(prefix='cleland-bench-') as workdir:
+        for name, (sizes, setup, unit) in BENCHMARKS.items():
+            if names and not any(pattern in name for pattern in names):
+                continue
+            for size in sizes[:1] if quick else sizes:
+                function = setup(size, workdir)
+                timings = time_callable(function, min_time)
+                result = {
+                    'benchmark': name, 'size': size, 'unit': unit,
+                    'seconds_min': min(timings), 'seconds_median': statistics.median(timings),
+                    'repeats': len(timings), 'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'), **context,
+                }
+                if profile_dir:
+                    os.makedirs(profile_dir, exist_ok=True)
+                    path = os.path.join(profile_dir, f'{name}_{size}.prof')
+                    result['profile'] = path
+                    result['profile_report'] = profile_callable(function, path)
+                yield result
+
+
+def compare(results_path):
+    """Median time per benchmark and size (rows) for each commit recorded in a results file (columns)."""
+    import pandas as pd
+
+    results = pd.read_json(results_path, lines=True)
+    return results.pivot_table(index=['benchmark', 'size'], columns='commit', values='seconds_median',
+                               aggfunc='min', sort=False)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark the hot paths on synthetic data.')
+    parser.add_argument('-k', dest='names', action='append', help='Only benchmarks whose name contains this')
+    parser.add_argument('--quick', action='store_true', help='Smallest size of each benchmark only')
+    parser.add_argument('--min-time', type=float, default=0.5, help='Minimum total seconds timed per size')
+    parser.add_argument('--output', default=DEFAULT_RESULTS, help='JSON lines file the results are appended to')
+    parser.add_argument('--profile', nargs='?', const=os.path.join(ROOT, 'benchmarks', 'profiles'),
+                        help='Also profile each run with cProfile (stats saved to this directory)')
+    parser.add_argument('--compare', metavar='RESULTS', help='Print the timings recorded per commit and exit')
+    args = parser.parse_args(argv)
+
+    if args.compare:
+        print(compare(args.compare).to_string())
+        return
+
+    with open(args.output, 'a') as handle:
+        for result in run_benchmarks(args.names, args.quick, args.profile, args.min_time):
+            report = result.pop('profile_report', None)
+            handle.write(json.dumps(result) + '\n')
+            handle.flush()
+            print(f"{result['benchmark']:<24s} {result['size']:>8} {result['unit']:<12s} "
+                  f"{result['seconds_median'] * 1000:10.2f} ms (min {result['seconds_min'] * 1000:.2f} ms, "
+                  f"{result['repeats']} runs)")
+            if report:
+                print(report)
+    print(f"Results appended to: {args.output}")
+
+
+if __name__ == '__main__':
+    main()
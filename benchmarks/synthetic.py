@@ -0,0 +1,189 @@
+import gzip
+
+import numpy as np
+
+from band_calibration import MARKER_LADDER_KDA
+from cleland_core import PEG_MASS_KDA
+
+# Approximate UniProt amino-acid frequencies (%), so masses and cysteine counts look like a real proteome
+AMINO_ACID_FREQUENCIES = {
+    'A': 8.25, 'R': 5.53, 'N': 4.06, 'D': 5.45, 'C': 1.37, 'Q': 3.93, 'E': 6.75, 'G': 7.07, 'H': 2.27,
+    'I': 5.96, 'L': 9.66, 'K': 5.84, 'M': 2.42, 'F': 3.86, 'P': 4.70, 'S': 6.56, 'T': 5.34, 'W': 1.08,
+    'Y': 2.92, 'V': 6.87,
+}
+
+
+def random_sequences(num_proteins, seed=0, median_length=400):
+    """Random protein sequences with realistic composition and log-normal lengths."""
+    rng = np.random.default_rng(seed)
+    letters = np.array(list(AMINO_ACID_FREQUENCIES), dtype='U1')
+    weights = np.array(list(AMINO_ACID_FREQUENCIES.values()))
+    lengths = np.clip(rng.lognormal(np.log(median_length), 0.6, num_proteins).astype(int), 30, 5000)
+    residues = rng.choice(letters, size=lengths.sum(), p=weights / weights.sum())
+    starts = np.concatenate(([0], np.cumsum(lengths)))
+    joined = ''.join(residues.tolist())
+    return ['M' + joined[start:stop - 1] for start, stop in zip(starts[:-1], starts[1:])]
+
+
+def write_fasta(path, num_proteins, seed=0):
+    """Write a UniProt-style (optionally gzipped) FASTA file of random proteins; returns the path."""
+    opener = gzip.open if str(path).endswith('.gz') else open
+    with opener(path, 'wt') as handle:
+        for i, sequence in enumerate(random_sequences(num_proteins, seed)):
+            handle.write(f">sp|SYN{i:06d}|SYN{i}_HUMAN Synthetic protein {i}\n")
+            for start in range(0, len(sequence), 60):
+                handle.write(sequence[start:start + 60] + '\n')
+    return path
+
+
+def make_gel(rows=2048, columns=None, num_samples=4, dtype=np.uint16, seed=0):
+    """A synthetic Cleland blot: marker lane on the left, then sample lanes with PEG-shifted bands.
+
+    Bands are dark on a light background at full 16-bit depth. Returns
+    (image, info), where info holds the true calibration coefficients, the
+    lane column ranges and each sample's protein and band fractions.
+    """
+    rng = np.random.default_rng(seed)
+    lane_width, gap = 40, 20
+    columns = columns or gap + (num_samples + 1) * (lane_width + gap)
+    # log10(MW) falls linearly from 250 kDa at 10% of the gel height to 15 kDa at 90%
+    slope = (np.log10(15) - np.log10(250)) / (0.8 * rows)
+    intercept = np.log10(250) - slope * 0.1 * rows
+    y = np.arange(rows)
+    band_width = max(1.5, rows / 400)
+
+    def lane_profile(masses, intensities):
+        centres = (np.log10(masses) - intercept) / slope
+        return (intensities[:, None] * np.exp(-0.5 * ((y - centres[:, None]) / band_width) ** 2)).sum(axis=0)
+
+    background = 0.8 * np.iinfo(dtype).max
+    image = np.full((rows, columns), background) + rng.normal(0, 200, (rows, columns))
+    lanes, samples = [], []
+    for lane in range(num_samples + 1):
+        x_start = gap + lane * (lane_width + gap)
+        if lane == 0:
+            profile = lane_profile(np.array(MARKER_LADDER_KDA, dtype=float), np.full(len(MARKER_LADDER_KDA), 1.0))
+        else:
+            num_cysteines = int(rng.integers(2, 8))
+            reduced_mass = float(rng.uniform(25, 80))
+            fractions = rng.dirichlet(np.ones(num_cysteines + 1))
+            masses = reduced_mass + PEG_MASS_KDA * np.arange(num_cysteines + 1)
+            profile = lane_profile(masses, fractions)
+            samples.append({'lane': (x_start, x_start + lane_width), 'reduced_mass': reduced_mass,
+                            'num_cysteines': num_cysteines, 'fractions': fractions})
+        image[:, x_start:x_start + lane_width] -= 0.6 * background * profile[:, None]
+        lanes.append((x_start, x_start + lane_width))
+    image = np.clip(image, 0, np.iinfo(dtype).max).astype(dtype)
+    return image, {'coefficients': (slope, intercept), 'lanes': lanes, 'samples': samples}
+
+
+def write_gel(path, rows=2048, **options):
+    """Save make_gel output as .npy (memory-mappable) or .tif; returns the info dict."""
+    image, info = make_gel(rows, **options)
+    if str(path).endswith(('.tif', '.tiff')):
+        import tifffile
+
+        tifffile.imwrite(path, image)
+    else:
+        np.save(path, image)
+    return info
+
+
+def make_protein_structure(num_residues=400, cysteine_every=10, seed=0):
+    """A compact coiled protein (backbone + CB, SG on every cysteine) as a Bio.PDB structure."""
+    from Bio.PDB.StructureBuilder import StructureBuilder
+
+    rng = np.random.default_rng(seed)
+    t = np.arange(num_residues)
+    # A helix wound into a superhelix keeps the chain compact, with side chains pointing outwards
+    ca = np.column_stack((12 * np.cos(t * 0.3) + 3 * np.cos(t * 1.7), 12 * np.sin(t * 0.3) + 3 * np.sin(t * 1.7),
+                          0.29 * t)) + rng.normal(0, 0.2, (num_residues, 3))
+    outward = ca * [1, 1, 0]
+    outward /= np.linalg.norm(outward, axis=1, keepdims=True)
+
+    builder = StructureBuilder()
+    builder.init_structure('synthetic')
+    builder.init_model(0)
+    builder.init_chain('A')
+    builder.init_seg(' ')
+    offsets = {'N': [0.5, 1.0, 0.0], 'C': [-0.5, 1.0, 0.5], 'O': [-0.5, 2.0, 0.8]}
+    for i in range(num_residues):
+        cysteine = i % cysteine_every == cysteine_every // 2
+        builder.init_residue('CYS' if cysteine else 'ALA', ' ', i + 1, ' ')
+        atoms = {'N': ca[i] + offsets['N'], 'CA': ca[i], 'C': ca[i] + offsets['C'], 'O': ca[i] + offsets['O'],
+                 'CB': ca[i] + 1.53 * outward[i]}
+        if cysteine:
+            atoms['SG'] = ca[i] + 3.3 * outward[i]
+        for name, coord in atoms.items():
+            # pLDDT-like B-factors, as in AlphaFold models
+            builder.init_atom(name, coord, 90.0, 1.0, ' ', f' {name:<3s}', element=name[0])
+    return builder.get_structure()
+
+
+def write_protein_pdb(path, num_residues=400, cysteine_every=10, seed=0):
+    from Bio.PDB import PDBIO
+
+    io = PDBIO()
+    io.set_structure(make_protein_structure(num_residues, cysteine_every, seed))
+    io.save(str(path))
+    return path
+
+
+def write_peg_pdb(path, num_monomers=113, seed=0):
+    """A PEG chain (C-C-O repeats, 5 kDa by default) as a persistent random coil; returns the path."""
+    from Bio.PDB import PDBIO
+    from Bio.PDB.StructureBuilder import StructureBuilder
+
+    rng = np.random.default_rng(seed)
+    steps = np.empty((3 * num_monomers, 3))
+    direction = np.array([0.0, 0.0, 1.0])
+    for i in range(len(steps)):
+        direction = direction + rng.normal(0, 0.5, 3)
+        direction /= np.linalg.norm(direction)
+        steps[i] = 1.45 * direction
+    coords = np.cumsum(steps, axis=0) - steps[0]
+
+    builder = StructureBuilder()
+    builder.init_structure('PEG')
+    builder.init_model(0)
+    builder.init_chain('A')
+    builder.init_seg(' ')
+    builder.init_residue('PEG', ' ', 1, ' ')
+    for i, coord in enumerate(coords):
+        element = 'O' if i % 3 == 2 else 'C'
+        name = f'{element}{i}'[:4]
+        builder.init_atom(name, coord, 0.0, 1.0, ' ', f'{name:<4s}', serial_number=i + 1, element=element)
+    io = PDBIO()
+    io.set_structure(builder.get_structure())
+    io.save(str(path))
+    return path
+
+
+def serve_sequences(sequences):
+    """A local stand-in for the UniProt REST API serving {accession: sequence} as /<accession>.fasta.
+
+    Runs in a daemon thread; the base URL is f'http://127.0.0.1:{server.server_port}'.
+    Returns the server (call shutdown() to stop it).
+    """
+    import threading
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            accession = self.path.rsplit('/', 1)[-1].removesuffix('.fasta')
+            if accession not in sequences:
+                self.send_error(404)
+                return
+            body = f">sp|{accession}|{accession}_HUMAN\n{sequences[accession]}\n".encode()
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/plain')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
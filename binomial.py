@@ -0,0 +1,48 @@
+from functools import lru_cache
+
+import numpy as np
+
+
+@lru_cache(maxsize=1024)
+def pascal_row(n):
+    """Exact row n of Pascal's triangle, C(n, 0..n), as a tuple of Python ints (memoized).
+
+    Built with the multiplicative recurrence C(n, k + 1) = C(n, k) * (n - k) / (k + 1)
+    over the first half of the row, then mirrored.
+    """
+    if n < 0:
+        raise ValueError(f"Row index must be non-negative, got {n}")
+    half = [1]
+    for k in range(n // 2):
+        half.append(half[-1] * (n - k) // (k + 1))
+    middle = half if n % 2 else half[:-1]
+    return tuple(half + middle[::-1])
+
+
+def pascal_triangle(num_rows):
+    """Exact rows 0..num_rows-1 of Pascal's triangle."""
+    return [list(pascal_row(n)) for n in range(num_rows)]
+
+
+def log_pascal_row(n):
+    """Natural log of C(n, 0..n) as a float64 array, without forming the (huge) integers."""
+    k = np.arange(n)
+    return np.concatenate(([0.0], np.cumsum(np.log((n - k) / (k + 1)))))
+
+
+def float_pascal_row(n):
+    """C(n, 0..n) as float64 (inf where a coefficient exceeds the float range, n > 1029)."""
+    with np.errstate(over='ignore'):
+        return np.exp(log_pascal_row(n))
+
+
+def log_pascal_triangle(num_rows):
+    """(num_rows, num_rows) array of ln C(n, k), NaN for k > n; for plotting large triangles."""
+    n = np.arange(num_rows)[:, None]
+    k = np.arange(num_rows)[None, :]
+    # ln C(n, k) = sum_{i<k} ln((n - i) / (i + 1)), accumulated along each row
+    with np.errstate(divide='ignore', invalid='ignore'):
+        steps = np.log((n - k + 1) / k)
+    steps[:, 0] = 0.0
+    table = np.cumsum(np.where(k <= n, steps, 0.0), axis=1)
+    return np.where(k <= n, table, np.nan)
@@ -0,0 +1,105 @@
+import os
+
+import numpy as np
+
+# Rows processed at a time when streaming over a scan
+DEFAULT_STRIP_ROWS = 256
+
+# ITU-R BT.601 luma weights for RGB scans
+_RGB_WEIGHTS = np.array([0.299, 0.587, 0.114])
+
+
+def open_scan(image_path):
+    """Open a blot scan at full bit depth, memory-mapped where the format allows.
+
+    .npy files and uncompressed TIFFs are memory-mapped, so nothing is read
+    until a strip is requested. Compressed TIFFs are decoded with tifffile, and
+    other formats (or TIFF codecs tifffile cannot decode) with
+    cv2.IMREAD_UNCHANGED; both keep 16-bit data. RGB scans are returned as
+    (rows, columns, channels) in RGB order.
+    """
+    extension = os.path.splitext(str(image_path))[1].lower()
+    if extension == '.npy':
+        return np.load(image_path, mmap_mode='r')
+    if extension in ('.tif', '.tiff'):
+        import tifffile
+
+        try:
+            return _squeeze_scan(tifffile.memmap(image_path, mode='r'))
+        except ValueError:
+            pass
+        try:
+            # Compressed or tiled TIFFs cannot be mapped and are decoded instead
+            return _squeeze_scan(tifffile.imread(image_path))
+        except ValueError:
+            # e.g. a codec that needs imagecodecs; OpenCV decodes LZW/Deflate itself
+            pass
+
+    import cv2
+
+    image = cv2.imread(str(image_path), cv2.IMREAD_UNCHANGED)
+    if image is None:
+        raise ValueError(f"Image not loaded correctly: {image_path}")
+    if image.ndim == 3:
+        # OpenCV returns BGR(A)
+        image = image[:, :, 2::-1]
+    return image
+
+
+def _squeeze_scan(image):
+    # Drop leading singleton page/sample axes that some scanners write
+    while image.ndim > 2 and image.shape[0] == 1:
+        image = image[0]
+    return image
+
+
+def to_gray(strip):
+    """Convert a strip to float64 grayscale, without rounding."""
+    strip = np.asarray(strip)
+    if strip.ndim == 3:
+        return strip[:, :, :3].astype(np.float64) @ _RGB_WEIGHTS[:strip.shape[2]]
+    return strip.astype(np.float64)
+
+
+def iter_strips(image, strip_rows=DEFAULT_STRIP_ROWS, columns=None):
+    """Yield (row_start, float64 gray strip) pairs covering the scan from top to bottom.
+
+    columns optionally restricts each strip to a (x_start, x_stop) range, so
+    only that part of a memory-mapped scan is ever read.
+    """
+    x_start, x_stop = columns if columns is not None else (0, image.shape[1])
+    for row_start in range(0, image.shape[0], strip_rows):
+        yield row_start, to_gray(image[row_start:row_start + strip_rows, x_start:x_stop])
+
+
+def scan_statistics(image, strip_rows=DEFAULT_STRIP_ROWS, sample_rows=512):
+    """Minimum, maximum and (row-subsampled) median intensity of a scan, in one streamed pass."""
+    minimum, maximum = np.inf, -np.inf
+    for _, strip in iter_strips(image, strip_rows):
+        minimum = min(minimum, strip.min())
+        maximum = max(maximum, strip.max())
+    step = max(1, image.shape[0] // sample_rows)
+    median = float(np.median(to_gray(image[::step])))
+    return {'min': float(minimum), 'max': float(maximum), 'median': median}
+
+
+def column_profile(image, strip_rows=DEFAULT_STRIP_ROWS):
+    """Mean intensity of every column, accumulated strip by strip."""
+    total = np.zeros(image.shape[1])
+    for _, strip in iter_strips(image, strip_rows):
+        total += strip.sum(axis=0)
+    return total / image.shape[0]
+
+
+def lane_profiles(image, lanes, strip_rows=DEFAULT_STRIP_ROWS):
+    """Mean intensity of every row of each lane, for all lanes in one pass over the scan.
+
+    lanes is a list of (x_start, x_stop) column ranges; returns an array of
+    shape (len(lanes), rows).
+    """
+    profiles = np.zeros((len(lanes), image.shape[0]))
+    for row_start, strip in iter_strips(image, strip_rows):
+        rows = slice(row_start, row_start + strip.shape[0])
+        for i, (x_start, x_stop) in enumerate(lanes):
+            profiles[i, rows] = strip[:, x_start:x_stop].mean(axis=1)
+    return profiles
@@ -0,0 +1,97 @@
+from functools import lru_cache
+from io import BytesIO
+
+import numpy as np
+
+from calibration import as_calibration
+from cleland_core import PEG_MASS_KDA
+
+# Marker molecular weights (kDa) labelled on the simulated blot
+AXIS_MARKERS_KDA = (10, 25, 37, 50, 75, 100, 150, 250)
+
+# Rendered PNGs kept in memory; each is a few hundred kB at 300 dpi
+RENDER_CACHE_SIZE = 64
+
+
+def band_layout(molecular_mass, num_cysteines, calibration):
+    """Gel rows and relative intensities of the n + 1 bands, plus the (top, bottom) rows of the view."""
+    calibration = as_calibration(calibration)
+    band_masses = molecular_mass + PEG_MASS_KDA * np.arange(num_cysteines + 1)
+    rows = calibration.mw_to_pixel(band_masses)
+    # Intensity decreases with oxidation
+    intensities = (num_cysteines - np.arange(num_cysteines + 1) + 1) / (num_cysteines + 1)
+    view = (float(calibration.mw_to_pixel(250)), float(calibration.mw_to_pixel(10)))
+    return rows, intensities, view
+
+
+def draw_immunoblot(fig, molecular_mass, num_cysteines, calibration):
+    """Draw the simulated immunoblot onto a matplotlib Figure."""
+    calibration = as_calibration(calibration)
+    rows, intensities, view = band_layout(molecular_mass, num_cysteines, calibration)
+    ax = fig.subplots()
+
+    # All bands as a single collection rather than one line artist each
+    ax.hlines(rows, 0.3, 0.7, linewidth=10 * intensities, color='black')
+    for i, y_pos in enumerate(rows):
+        ax.text(0.75, y_pos, f'{(100 * (num_cysteines - i) / num_cysteines):.1f}%', verticalalignment='center',
+                fontsize=12)
+
+    # Set fixed y-axis limits (scale invariant)
+    ax.set_ylim(*view)
+    ax.set_xlim(0, 1)
+    ax.set_yticks(calibration.mw_to_pixel(np.array(AXIS_MARKERS_KDA)))
+    ax.set_yticklabels([f'{mw:.0f} kDa' for mw in AXIS_MARKERS_KDA])
+    ax.set_xticks([])
+    ax.set_xlabel('Protein Redox States', fontsize=15)
+    ax.set_ylabel('Molecular Mass (kDa)', fontsize=15)
+    ax.set_title('Simulated Immunoblot', fontsize=20)
+
+    # Invert the y-axis to match the appearance of a real blot
+    ax.invert_yaxis()
+    fig.tight_layout()
+
+
+@lru_cache(maxsize=RENDER_CACHE_SIZE)
+def _render_png(molecular_mass, num_cysteines, calibration, dpi):
+    from matplotlib.figure import Figure
+
+    # A bare Figure is not registered with pyplot, so it is freed as soon as it goes out of scope
+    fig = Figure(figsize=(5, 8))
+    try:
+        draw_immunoblot(fig, molecular_mass, num_cysteines, calibration)
+        buf = BytesIO()
+        fig.savefig(buf, format='png', dpi=dpi)
+    finally:
+        fig.clear()
+    return buf.getvalue()
+
+
+def render_immunoblot_png(molecular_mass, num_cysteines, calibration, dpi=300):
+    """Full matplotlib rendering of the simulated immunoblot as PNG bytes.
+
+    Results are memoized in a bounded LRU keyed by (mass, cysteine count,
+    calibration, dpi), so reruns with the same inputs cost nothing.
+    """
+    return _render_png(round(float(molecular_mass), 6), int(num_cysteines), as_calibration(calibration), dpi)
+
+
+def rasterize_immunoblot(molecular_mass, num_cysteines, calibration, height=480, width=200):
+    """Fast preview: draw the bands straight into a (height, width) uint8 image (white background).
+
+    Faint grey lines mark the axis marker positions. No matplotlib involved.
+    """
+    rows, intensities, (top, bottom) = band_layout(molecular_mass, num_cysteines, calibration)
+    image = np.full((height, width), 255, dtype=np.uint8)
+    scale = (height - 1) / (bottom - top)
+
+    marker_rows = np.round((as_calibration(calibration).mw_to_pixel(np.array(AXIS_MARKERS_KDA)) - top) * scale)
+    marker_rows = marker_rows[(marker_rows >= 0) & (marker_rows < height)].astype(int)
+    image[marker_rows, :width // 10] = 160
+
+    # Band i covers rows centre +/- half its thickness, like the linewidth of the full plot
+    centres = (rows - top) * scale
+    half_thickness = np.maximum(0.5, intensities * height / 160)
+    y = np.arange(height)[:, None]
+    covered = (np.abs(y - centres[None, :]) <= half_thickness[None, :]).any(axis=1)
+    image[covered, int(0.3 * width):int(0.7 * width)] = 0
+    return image
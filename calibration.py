@@ -0,0 +1,150 @@
+import json
+import os
+from functools import lru_cache
+
+import numpy as np
+
+KINDS = ('linear', 'piecewise', 'spline')
+
+# Points in the lookup table used to invert a spline calibration
+_SPLINE_TABLE_POINTS = 2049
+
+
+class CalibrationModel:
+    """Mapping between gel pixel row and molecular weight (kDa) for one gel/scan.
+
+    The model is log10(MW) as a function of pixel row:
+    - 'linear': a straight line, log10(MW) = slope * pixel + intercept,
+      i.e. the np.polyfit coefficients written by Band_calibrator.py;
+    - 'piecewise': straight segments between the marker bands;
+    - 'spline': a monotone (PCHIP) curve through the marker bands.
+    Piecewise and spline models are extended beyond the outermost markers
+    along their end segments. Both directions accept scalars or arrays.
+    """
+
+    def __init__(self, kind, pixels=(), log_mw=(), coefficients=None):
+        if kind not in KINDS:
+            raise ValueError(f"Unknown calibration kind: {kind!r} (expected one of {KINDS})")
+        order = np.argsort(pixels)
+        self.kind = kind
+        self.pixels = np.asarray(pixels, dtype=np.float64)[order]
+        self.log_mw = np.asarray(log_mw, dtype=np.float64)[order]
+        if coefficients is None:
+            coefficients = np.polyfit(self.pixels, self.log_mw, 1)
+        self.coefficients = np.asarray(coefficients, dtype=np.float64)
+        if kind != 'linear':
+            if len(self.pixels) < 2:
+                raise ValueError(f"A {kind} calibration needs at least 2 marker bands")
+            if np.any(np.diff(self.log_mw) >= 0):
+                raise ValueError("Marker molecular weights must decrease down the gel")
+        if kind == 'spline':
+            from scipy.interpolate import PchipInterpolator
+
+            spline = PchipInterpolator(self.pixels, self.log_mw, extrapolate=False)
+            self._table_pixels = np.linspace(self.pixels[0], self.pixels[-1], _SPLINE_TABLE_POINTS)
+            self._table_log_mw = spline(self._table_pixels)
+        elif kind == 'piecewise':
+            self._table_pixels, self._table_log_mw = self.pixels, self.log_mw
+
+    @classmethod
+    def fit(cls, pixel_positions, molecular_weights, kind='linear', coefficients=None):
+        """Build a model from marker band pixel rows and their molecular weights (kDa)."""
+        return cls(kind, pixel_positions, np.log10(np.asarray(molecular_weights, dtype=np.float64)), coefficients)
+
+    @classmethod
+    def from_coefficients(cls, coefficients):
+        """Linear model from (slope, intercept) log10(MW)-vs-pixel coefficients."""
+        return cls('linear', coefficients=coefficients)
+
+    def log_mw_at(self, pixel):
+        """log10(MW) at pixel row(s)."""
+        pixel = np.asarray(pixel, dtype=np.float64)
+        slope, intercept = self.coefficients
+        if self.kind == 'linear':
+            return slope * pixel + intercept
+        pixels, log_mw = self._table_pixels, self._table_log_mw
+        result = np.interp(pixel, pixels, log_mw)
+        # Extend along the end segments outside the markers
+        first = (log_mw[1] - log_mw[0]) / (pixels[1] - pixels[0])
+        last = (log_mw[-1] - log_mw[-2]) / (pixels[-1] - pixels[-2])
+        result = np.where(pixel < pixels[0], log_mw[0] + first * (pixel - pixels[0]), result)
+        return np.where(pixel > pixels[-1], log_mw[-1] + last * (pixel - pixels[-1]), result)
+
+    def pixel_at(self, log_mw):
+        """Pixel row(s) at log10(MW)."""
+        log_mw = np.asarray(log_mw, dtype=np.float64)
+        slope, intercept = self.coefficients
+        if self.kind == 'linear':
+            return (log_mw - intercept) / slope
+        pixels, table_log_mw = self._table_pixels, self._table_log_mw
+        # log10(MW) decreases down the gel, so reverse both for np.interp
+        result = np.interp(log_mw, table_log_mw[::-1], pixels[::-1])
+        first = (pixels[1] - pixels[0]) / (table_log_mw[1] - table_log_mw[0])
+        last = (pixels[-1] - pixels[-2]) / (table_log_mw[-1] - table_log_mw[-2])
+        result = np.where(log_mw > table_log_mw[0], pixels[0] + first * (log_mw - table_log_mw[0]), result)
+        return np.where(log_mw < table_log_mw[-1], pixels[-1] + last * (log_mw - table_log_mw[-1]), result)
+
+    def pixel_to_mw(self, pixel):
+        """Molecular weight (kDa) at pixel row(s)."""
+        return 10 ** self.log_mw_at(pixel)
+
+    def mw_to_pixel(self, molecular_weight):
+        """Pixel row(s) at which a molecular weight (kDa) runs."""
+        return self.pixel_at(np.log10(molecular_weight))
+
+    @property
+    def key(self):
+        """Hashable identity of the model, for use in cache keys."""
+        return (self.kind, tuple(self.coefficients), tuple(self.pixels), tuple(self.log_mw))
+
+    def __eq__(self, other):
+        return isinstance(other, CalibrationModel) and self.key == other.key
+
+    def __hash__(self):
+        return hash(self.key)
+
+    def __repr__(self):
+        return f"CalibrationModel({self.kind!r}, coefficients={self.coefficients.tolist()}, markers={len(self.pixels)})"
+
+    def to_dict(self):
+        return {
+            'kind': self.kind,
+            'coefficients': self.coefficients.tolist(),
+            'pixel_positions': self.pixels.tolist(),
+            'molecular_weights': (10 ** self.log_mw).tolist(),
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        """Load a model from to_dict output or a band_calibration result (which nests it under 'model')."""
+        data = data.get('model', data)
+        pixels = data.get('pixel_positions', [])
+        molecular_weights = data.get('molecular_weights', [])
+        return cls.fit(pixels, molecular_weights, data.get('kind', 'linear'), data.get('coefficients'))
+
+    def save(self, path):
+        with open(path, 'w') as handle:
+            json.dump(self.to_dict(), handle, indent=2)
+
+
+def as_calibration(calibration):
+    """Accept a CalibrationModel, a (slope, intercept) pair, a dict, or a path to a JSON file."""
+    if isinstance(calibration, CalibrationModel):
+        return calibration
+    if isinstance(calibration, dict):
+        return CalibrationModel.from_dict(calibration)
+    if isinstance(calibration, (str, os.PathLike)):
+        return load_calibration(calibration)
+    return CalibrationModel.from_coefficients(calibration)
+
+
+@lru_cache(maxsize=256)
+def _load_calibration(path, modified):
+    with open(path, 'r') as handle:
+        return CalibrationModel.from_dict(json.load(handle))
+
+
+def load_calibration(path):
+    """Load a calibration JSON file, cached until the file changes."""
+    path = os.path.abspath(path)
+    return _load_calibration(path, os.path.getmtime(path))
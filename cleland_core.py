@@ -0,0 +1,53 @@
+# Pure computation behind the Cleland immunoblot simulator, importable without Streamlit.
+# Only numpy is loaded up front so the app starts quickly.
+import mass_engine
+from calibration import as_calibration
+from proteoform_model import band_sizes, num_proteoforms
+
+# Mass added by each PEG-maleimide label on a cysteine (kDa)
+PEG_MASS_KDA = 5
+
+# Proteins whose 100%-oxidised mass is below this (kDa) are resolvable by Cleland immunoblotting
+CLELAND_MAX_OXIDISED_MASS = 152
+
+
+def fetch_sequence(accession):
+    """Sequence for a UniProt accession from the default store (None if unknown).
+
+    Network errors from the UniProt fallback propagate as requests exceptions.
+    """
+    from sequence_store import get_default_provider
+
+    return get_default_provider().get(accession)
+
+
+def molecular_mass(sequence):
+    """Average molecular mass (kDa) of a protein sequence."""
+    return mass_engine.molecular_mass(sequence)
+
+
+def pascal_row(num_cysteines):
+    """Proteoforms per band (Pascal triangle row) for n cysteines."""
+    return band_sizes(num_cysteines)
+
+
+def band_position(molecular_weight, calibration):
+    """Gel pixel row at which a molecular weight (kDa) runs, for any calibration as_calibration accepts."""
+    return as_calibration(calibration).mw_to_pixel(molecular_weight)
+
+
+def protein_summary(sequence):
+    """Everything the simulator reports about one sequence, as a dict."""
+    num_cysteines = sequence.count('C')
+    reduced_mass = molecular_mass(sequence)
+    oxidised_mass = reduced_mass + num_cysteines * PEG_MASS_KDA
+    return {
+        'length': len(sequence),
+        'num_cysteines': num_cysteines,
+        'num_bands': num_cysteines + 1,
+        'num_proteoforms': num_proteoforms(num_cysteines),
+        'pascal_row': pascal_row(num_cysteines),
+        'reduced_mass': reduced_mass,
+        'oxidised_mass': oxidised_mass,
+        'cleland_suitable': bool(oxidised_mass < CLELAND_MAX_OXIDISED_MASS),
+    }
@@ -0,0 +1,342 @@
+import argparse
+import hashlib
+import json
+import os
+import resource
+import sys
+import time
+import traceback
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+# Stage name: (stages it depends on, config keys it needs, config keys its results depend on).
+# Stages whose needed keys are missing are skipped; input files among the last keys are fingerprinted.
+STAGES = {
+    'proteome': ((), ('fasta',), ('fasta',)),
+    'analysis': (('proteome',), (), ('mass_table', 'cutoffs')),
+    'calibration': ((), ('gel_dir',), ('gel_dir', 'calibration_options')),
+    'densitometry': (('calibration',), ('densitometry_manifest',), ('densitometry_manifest',)),
+    'modelling': ((), ('modelling',), ('modelling',)),
+    'structures': (('proteome',), ('structure_source',),
+                   ('structure_source', 'peg_pdb', 'mass_table', 'detectable_only')),
+}
+
+MANIFEST_NAME = 'pipeline_manifest.json'
+METRICS_NAME = 'pipeline_metrics.jsonl'
+
+# Example configuration; paths are relative to the config file
+EXAMPLE_CONFIG = {
+    'output_dir': 'cleland_output',
+    'processes': None,
+    'fasta': 'proteins.fasta.gz',
+    'cutoffs': [150, 200],
+    'gel_dir': 'gels',
+    'densitometry_manifest': 'lanes.csv',
+    'modelling': {
+        'proteoforms': {'alpha': 0, 'beta': 20, 'gamma': 40, 'delta': 60, 'epsilon': 80, 'zeta': 100},
+        'target_oxidation': 20,
+        'num_molecules': 10,
+        'solution_space_M': 2.9e16,
+    },
+    'structure_source': 'alphafold_structures.tar',
+    'peg_pdb': 'F0vmOQ.pdb',
+    'detectable_only': True,
+}
+
+
+# Each stage takes the config and its output directory and returns {'items': count, 'outputs': [paths]}.
+
+def run_proteome(config, stage_dir):
+    from proteome_masses import build_mass_table
+
+    output = os.path.join(stage_dir, 'protein_masses.parquet')
+    total = build_mass_table(config['fasta'], output, processes=config.get('processes'))
+    return {'items': total, 'outputs': [output]}
+
+
+def run_analysis(config, stage_dir):
+    from proteome_analysis import DEFAULT_CUTOFFS_KDA, analyse_table, render_figures
+
+    analysis = analyse_table(mass_table_path(config), config.get('cutoffs', DEFAULT_CUTOFFS_KDA))
+    table = os.path.join(stage_dir, 'proteins_per_cysteine_count.csv')
+    analysis['per_cysteine'].to_csv(table)
+    figures = render_figures(analysis, stage_dir, processes=config.get('processes'))
+    return {'items': analysis['num_proteins'], 'outputs': [table] + figures}
+
+
+def run_calibration(config, stage_dir):
+    from band_calibration import calibrate_directory
+
+    summary = calibrate_directory(config['gel_dir'], stage_dir, processes=config.get('processes'),
+                                  **config.get('calibration_options', {}))
+    return {'items': len(summary), 'outputs': [os.path.join(stage_dir, 'calibration_summary.csv')]}
+
+
+def run_densitometry(config, stage_dir):
+    import pandas as pd
+
+    from densitometry import quantify_batch, summarise_lanes
+
+    manifest = pd.read_csv(config['densitometry_manifest'])
+    # Image and calibration paths in the manifest are relative to the manifest itself
+    base = os.path.dirname(config['densitometry_manifest'])
+    manifest['image'] = manifest['image'].map(lambda image: os.path.join(base, image))
+    if 'calibration' in manifest:
+        manifest['calibration'] = manifest['calibration'].map(lambda path: os.path.join(base, path), na_action='ignore')
+    # Lanes without an explicit calibration use the one fitted to their own gel by the calibration stage
+    calibration_dir = os.path.join(config['output_dir'], 'calibration')
+    default = manifest['image'].map(
+        lambda image: os.path.join(calibration_dir, f"{os.path.splitext(os.path.basename(image))[0]}_calibration.json"))
+    manifest['calibration'] = manifest['calibration'].fillna(default) if 'calibration' in manifest else default
+    results = quantify_batch(manifest, processes=config.get('processes'))
+    bands = os.path.join(stage_dir, 'densitometry_bands.csv')
+    lanes = os.path.join(stage_dir, 'densitometry_lanes.csv')
+    results.to_csv(bands, index=False)
+    summarise_lanes(results).to_csv(lanes, index=False)
+    return {'items': len(manifest), 'outputs': [bands, lanes]}
+
+
+def run_modelling(config, stage_dir):
+    from oxidation_solver import count_solutions, solutions_frame
+    from solution_space import find_molecule_count_for_M
+
+    settings = config['modelling']
+    proteoforms = settings['proteoforms']
+    solutions = solutions_frame(proteoforms, settings['num_molecules'], settings['target_oxidation'],
+                                limit=settings.get('max_solutions'))
+    count = count_solutions(list(proteoforms.values()), settings['num_molecules'], settings['target_oxidation'])
+    solutions_path = os.path.join(stage_dir, 'oxidation_state_solutions.csv')
+    solutions.to_csv(solutions_path, index=False)
+    outputs = [solutions_path]
+
+    summary = {'num_solutions': count}
+    if settings.get('solution_space_M'):
+        molecules, size, table = find_molecule_count_for_M(settings['solution_space_M'], len(proteoforms), table=True)
+        summary.update(molecule_count=molecules, solution_space_size=size)
+        if table is not None:
+            table_path = os.path.join(stage_dir, 'solution_space_size_results.csv')
+            table.to_csv(table_path, index=False)
+            outputs.append(table_path)
+    summary_path = os.path.join(stage_dir, 'modelling_summary.json')
+    with open(summary_path, 'w') as handle:
+        # Counts can exceed 64 bits, so they are stored as strings
+        json.dump({key: str(value) for key, value in summary.items()}, handle, indent=2)
+    return {'items': len(solutions), 'outputs': outputs + [summary_path]}
+
+
+def run_structures(config, stage_dir):
+    from structure_batch import detectable_accessions, process_structures
+
+    accessions = None
+    if config.get('detectable_only') and os.path.exists(mass_table_path(config)):
+        accessions = detectable_accessions(mass_table_path(config))
+    summary = process_structures(config['structure_source'], stage_dir, peg_path=config.get('peg_pdb'),
+                                 accessions=accessions, processes=config.get('processes'))
+    return {'items': len(summary), 'outputs': [os.path.join(stage_dir, 'structures.csv')]}
+
+
+STAGE_FUNCTIONS = {
+    'proteome': run_proteome,
+    'analysis': run_analysis,
+    'calibration': run_calibration,
+    'densitometry': run_densitometry,
+    'modelling': run_modelling,
+    'structures': run_structures,
+}
+
+
+def mass_table_path(config):
+    return config.get('mass_table') or os.path.join(config['output_dir'], 'proteome', 'protein_masses.parquet')
+
+
+def load_config(path):
+    """Read a JSON config, resolving relative paths against the config file's directory."""
+    with open(path, 'r') as handle:
+        config = json.load(handle)
+    base = os.path.dirname(os.path.abspath(path))
+    for key in ('output_dir', 'fasta', 'mass_table', 'gel_dir', 'densitometry_manifest', 'structure_source',
+                'peg_pdb'):
+        if config.get(key):
+            config[key] = os.path.join(base, config[key])
+    config.setdefault('output_dir', os.path.join(base, 'cleland_output'))
+    return config
+
+
+def _fingerprint_path(path):
+    # Size and modification time of a file, or of every file under a directory
+    if os.path.isdir(path):
+        files = (os.path.join(folder, name) for folder, _, names in os.walk(path) for name in names)
+        return sorted((os.path.relpath(file, path), *_fingerprint_path(file)) for file in files)
+    if os.path.exists(path):
+        stat = os.stat(path)
+        return [stat.st_size, stat.st_mtime_ns]
+    return None
+
+
+def stage_fingerprint(stage, config, upstream):
+    """Hash of everything a stage's result depends on: its settings, its input files and its upstream stages."""
+    settings = {key: config.get(key) for key in STAGES[stage][2]}
+    files = {key: _fingerprint_path(value) for key, value in settings.items() if isinstance(value, str)}
+    payload = json.dumps({'stage': stage, 'settings': settings, 'files': files, 'upstream': upstream},
+                         sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def _run_stage(stage, config):
+    """Run one stage in its own process and measure it."""
+    stage_dir = os.path.join(config['output_dir'], stage)
+    os.makedirs(stage_dir, exist_ok=True)
+    start = time.perf_counter()
+    try:
+        result = STAGE_FUNCTIONS[stage](config, stage_dir)
+        status, error = 'completed', None
+    except Exception as e:
+        result, status = {'items': 0, 'outputs': []}, 'failed'
+        error = f"{type(e).__name__}: {e}\n{traceback.format_exc()}"
+    wall = time.perf_counter() - start
+    # ru_maxrss is in kB on Linux and bytes on macOS
+    scale = 1 / 1024 ** 2 if sys.platform == 'darwin' else 1 / 1024
+    return {
+        'stage': stage,
+        'status': status,
+        'error': error,
+        'wall_seconds': wall,
+        'peak_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale,
+        'children_peak_rss_mb': resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss * scale,
+        'items': result['items'],
+        'items_per_second': result['items'] / wall if wall > 0 else None,
+        'outputs': result['outputs'],
+    }
+
+
+def _read_manifest(path):
+    if not os.path.exists(path):
+        return {}
+    with open(path, 'r') as handle:
+        return json.load(handle)
+
+
+def _write_manifest(path, manifest):
+    temporary = path + '.tmp'
+    with open(temporary, 'w') as handle:
+        json.dump(manifest, handle, indent=2)
+    os.replace(temporary, path)
+
+
+def run_pipeline(config, stages=None, force=False, jobs=2):
+    """Run the selected stages (and what they need), skipping checkpointed ones; returns the stage records.
+
+    A stage is skipped when the manifest holds a completed run with the same
+    fingerprint and its outputs still exist. Stages whose dependencies are met
+    run in parallel, up to jobs at a time, each in a fresh process so its peak
+    memory is its own. Every stage appends one metrics line to
+    pipeline_metrics.jsonl.
+    """
+    output_dir = config['output_dir']
+    os.makedirs(output_dir, exist_ok=True)
+    manifest_path = os.path.join(output_dir, MANIFEST_NAME)
+    metrics_path = os.path.join(output_dir, METRICS_NAME)
+    manifest = _read_manifest(manifest_path)
+    run_id = time.strftime('%Y%m%dT%H%M%S')
+
+    # Requested stages plus their dependencies, keeping only those that are configured
+    selected = set(stages or STAGES)
+    for stage in list(selected):
+        selected.update(STAGES[stage][0])
+    records = {}
+    for stage in STAGES:
+        if stage not in selected:
+            continue
+        missing = [key for key in STAGES[stage][1] if not config.get(key)]
+        if missing:
+            records[stage] = {'stage': stage, 'status': 'skipped', 'error': f"not configured: {', '.join(missing)}"}
+
+    def log(record):
+        line = {'run_id': run_id, 'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'), **record}
+        with open(metrics_path, 'a') as handle:
+            handle.write(json.dumps(line, default=str) + '\n')
+        error = f" ({record['error'].splitlines()[0]})" if record.get('error') else ''
+        wall = f" in {record['wall_seconds']:.1f} s" if 'wall_seconds' in record else ''
+        print(f"[{record['stage']}] {record['status']}{wall}{error}")
+
+    for record in records.values():
+        log(record)
+
+    pending = [stage for stage in STAGES if stage in selected and stage not in records]
+    fingerprints = {}
+    running = {}
+    with ProcessPoolExecutor(max_workers=max(1, jobs), max_tasks_per_child=1) as executor:
+        while pending or running:
+            for stage in list(pending):
+                dependencies = STAGES[stage][0]
+                states = [records.get(dependency, {}).get('status') for dependency in dependencies]
+                if any(state in ('failed', 'blocked') for state in states):
+                    pending.remove(stage)
+                    records[stage] = {'stage': stage, 'status': 'blocked', 'error': 'an upstream stage failed'}
+                    log(records[stage])
+                    continue
+                # Unconfigured optional upstream stages (e.g. structures from existing mass tables) are fine
+                if not all(state in ('completed', 'cached', 'skipped') for state in states):
+                    continue
+                if len(running) >= max(1, jobs):
+                    break
+                pending.remove(stage)
+                fingerprints[stage] = stage_fingerprint(
+                    stage, config, {dependency: fingerprints.get(dependency) for dependency in dependencies})
+                previous = manifest.get(stage, {})
+                if (not force and previous.get('status') == 'completed'
+                        and previous.get('fingerprint') == fingerprints[stage]
+                        and all(os.path.exists(path) for path in previous.get('outputs', []))):
+                    records[stage] = {'stage': stage, 'status': 'cached', 'outputs': previous['outputs']}
+                    log(records[stage])
+                    continue
+                running[executor.submit(_run_stage, stage, config)] = stage
+
+            if not running:
+                continue
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                stage = running.pop(future)
+                record = future.result()
+                records[stage] = record
+                if record['status'] == 'completed':
+                    manifest[stage] = {'fingerprint': fingerprints[stage], 'status': 'completed',
+                                       'outputs': record['outputs'], 'completed': time.strftime('%Y-%m-%dT%H:%M:%S'),
+                                       'wall_seconds': record['wall_seconds']}
+                else:
+                    manifest.pop(stage, None)
+                _write_manifest(manifest_path, manifest)
+                log(record)
+    return [records[stage] for stage in STAGES if stage in records]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Run the Cleland analysis pipeline from a JSON config.')
+    parser.add_argument('config', nargs='?', help='Pipeline config (JSON); see --example-config')
+    parser.add_argument('--stages', help=f"Comma-separated stages to run (default: all of {', '.join(STAGES)})")
+    parser.add_argument('--output-dir', help='Override the output directory from the config')
+    parser.add_argument('--jobs', type=int, default=2, help='Stages run in parallel (default: 2)')
+    parser.add_argument('--processes', type=int, help='Worker processes used inside each stage')
+    parser.add_argument('--force', action='store_true', help='Rerun stages even when checkpointed')
+    parser.add_argument('--example-config', action='store_true', help='Print an example config and exit')
+    args = parser.parse_args(argv)
+
+    if args.example_config or not args.config:
+        print(json.dumps(EXAMPLE_CONFIG, indent=2))
+        return
+    config = load_config(args.config)
+    if args.output_dir:
+        config['output_dir'] = os.path.abspath(args.output_dir)
+    if args.processes:
+        config['processes'] = args.processes
+    stages = args.stages.split(',') if args.stages else None
+    unknown = set(stages or ()) - set(STAGES)
+    if unknown:
+        parser.error(f"unknown stages: {', '.join(sorted(unknown))}")
+
+    records = run_pipeline(config, stages, force=args.force, jobs=args.jobs)
+    if any(record['status'] in ('failed', 'blocked') for record in records):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
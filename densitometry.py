@@ -0,0 +1,183 @@
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from band_calibration import band_signal, find_lanes
+from blot_io import DEFAULT_STRIP_ROWS, column_profile, lane_profiles, open_scan, scan_statistics
+from calibration import as_calibration, load_calibration
+from cleland_core import PEG_MASS_KDA
+
+
+def expected_band_pixels(reduced_mass, num_cysteines, calibration):
+    """Pixel rows of the n + 1 Cleland bands on a calibrated gel.
+
+    calibration is a CalibrationModel or anything calibration.as_calibration
+    accepts, e.g. (slope, intercept) coefficients. Band i carries i PEG
+    labels, i.e. i oxidised cysteines, so band 0 is the 100%-reduced form and
+    band n the 100%-oxidised form.
+    """
+    masses = reduced_mass + PEG_MASS_KDA * np.arange(num_cysteines + 1)
+    return as_calibration(calibration).mw_to_pixel(masses)
+
+
+def band_windows(band_pixels, num_rows):
+    """Integration windows [start, stop) around each band, split halfway between neighbours."""
+    order = np.argsort(band_pixels)
+    centres = band_pixels[order]
+    if len(centres) > 1:
+        half_gap = np.diff(centres) / 2
+        edges = np.concatenate((
+            [centres[0] - half_gap[0]],
+            centres[:-1] + half_gap,
+            [centres[-1] + half_gap[-1]],
+        ))
+    else:
+        edges = np.array([centres[0] - 2, centres[0] + 2])
+    edges = np.clip(np.round(edges), 0, num_rows).astype(int)
+    starts, stops = np.empty(len(centres), dtype=int), np.empty(len(centres), dtype=int)
+    starts[order], stops[order] = edges[:-1], edges[1:]
+    return starts, stops
+
+
+def subtract_background(profile, window):
+    """Remove a rolling-minimum (then smoothed) baseline from a lane profile."""
+    from scipy.ndimage import minimum_filter1d, uniform_filter1d
+
+    baseline = uniform_filter1d(minimum_filter1d(profile, size=window), size=window)
+    return np.clip(profile - baseline, 0, None)
+
+
+def quantify_lane(profile, reduced_mass, num_cysteines, calibration, background_window=None):
+    """Integrate the background-subtracted Cleland bands of one lane profile.
+
+    profile is the band signal of the lane (bands bright). Returns a dict with
+    the band positions, integrated intensities, per-band fractions and the
+    mean % oxidation (sum of fraction_i * i / n).
+    """
+    band_pixels = expected_band_pixels(reduced_mass, num_cysteines, calibration)
+    starts, stops = band_windows(band_pixels, len(profile))
+    if background_window is None:
+        # Wide enough that the whole band ladder never lifts the baseline
+        background_window = max(15, 2 * int(stops.max() - starts.min()) + 1)
+    signal = subtract_background(profile, background_window)
+
+    cumulative = np.concatenate(([0.0], np.cumsum(signal)))
+    intensities = cumulative[stops] - cumulative[starts]
+    total = intensities.sum()
+    fractions = intensities / total if total > 0 else np.full(len(intensities), np.nan)
+    oxidised = np.arange(num_cysteines + 1) / num_cysteines if num_cysteines else np.zeros(1)
+    return {
+        'band_pixels': band_pixels,
+        'intensities': intensities,
+        'fractions': fractions,
+        'mean_oxidation_percent': float(np.sum(fractions * oxidised) * 100),
+    }
+
+
+def quantify_gel(image_path, calibration, lanes, strip_rows=DEFAULT_STRIP_ROWS, background_window=None):
+    """Quantify several lanes of one gel, reading the scan once.
+
+    Each lane is a dict with 'reduced_mass' (kDa), 'num_cysteines', and either
+    'lane' (an (x_start, x_stop) column range) or 'lane_index' (position among
+    the automatically detected lanes, left to right); any other keys, such as a
+    sample name, are copied to the output. Returns one row per band.
+    """
+    calibration = as_calibration(calibration)
+    image = open_scan(image_path)
+    stats = scan_statistics(image, strip_rows)
+    detected = None
+    ranges = []
+    for lane in lanes:
+        if 'lane' in lane:
+            ranges.append(tuple(lane['lane']))
+            continue
+        if detected is None:
+            detected = find_lanes(band_signal(column_profile(image, strip_rows), stats))
+        ranges.append(detected[int(lane['lane_index'])])
+
+    profiles = band_signal(lane_profiles(image, ranges, strip_rows), stats)
+    rows = []
+    for lane, lane_range, profile in zip(lanes, ranges, profiles):
+        result = quantify_lane(profile, lane['reduced_mass'], int(lane['num_cysteines']), calibration,
+                               background_window)
+        labels = {key: value for key, value in lane.items() if key not in ('lane', 'lane_index')}
+        for band, (pixel, intensity, fraction) in enumerate(
+                zip(result['band_pixels'], result['intensities'], result['fractions'])):
+            rows.append({
+                'image': str(image_path),
+                **labels,
+                'x_start': lane_range[0],
+                'x_stop': lane_range[1],
+                'band': band,
+                'band_pixel': pixel,
+                'intensity': intensity,
+                'fraction': fraction,
+                'mean_oxidation_percent': result['mean_oxidation_percent'],
+            })
+    return pd.DataFrame(rows)
+
+
+def _quantify_job(job):
+    image_path, calibration_path, lanes, options = job
+    try:
+        # Cached per worker, so gels sharing a calibration file load it once
+        return quantify_gel(image_path, load_calibration(calibration_path), lanes, **options)
+    except Exception as e:
+        # One unreadable gel should not stop the batch
+        return pd.DataFrame([{'image': str(image_path), 'error': str(e)}])
+
+
+def quantify_batch(manifest, processes=None, **options):
+    """Quantify every lane listed in a manifest, one gel per worker process.
+
+    manifest is a DataFrame (or CSV path) with columns image, calibration (a
+    JSON file from band_calibration), reduced_mass, num_cysteines and either
+    lane_index or x_start/x_stop; extra columns (e.g. sample) are carried
+    through. Returns the per-band results of all gels.
+    """
+    if not isinstance(manifest, pd.DataFrame):
+        manifest = pd.read_csv(manifest)
+    jobs = []
+    for (image_path, calibration_path), group in manifest.groupby(['image', 'calibration'], sort=False):
+        lanes = []
+        for record in group.drop(columns=['image', 'calibration']).to_dict('records'):
+            record = {key: value for key, value in record.items() if not pd.isna(value)}
+            if 'x_start' in record:
+                record['lane'] = (int(record.pop('x_start')), int(record.pop('x_stop')))
+            lanes.append(record)
+        jobs.append((image_path, calibration_path, lanes, options))
+
+    with ProcessPoolExecutor(max_workers=processes) as executor:
+        results = list(executor.map(_quantify_job, jobs))
+    return pd.concat(results, ignore_index=True) if results else pd.DataFrame()
+
+
+def summarise_lanes(results):
+    """One row per lane: mean % oxidation and the band fractions as a list."""
+    if 'band' not in results:
+        # Nothing was quantified (no lanes, or every gel failed)
+        return pd.DataFrame(columns=['image', 'mean_oxidation_percent', 'fractions'])
+    lane_columns = [column for column in results.columns
+                    if column not in ('band', 'band_pixel', 'intensity', 'fraction', 'mean_oxidation_percent')]
+    quantified = results.dropna(subset=['band'])
+    return (quantified.groupby(lane_columns, sort=False, dropna=False)
+            .agg(mean_oxidation_percent=('mean_oxidation_percent', 'first'), fractions=('fraction', list))
+            .reset_index())
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Quantify Cleland band fractions and % oxidation from gel scans.')
+    parser.add_argument('manifest', help='CSV listing image, calibration, lane and protein for each lane')
+    parser.add_argument('output', help='CSV file for the per-band results')
+    parser.add_argument('--processes', type=int, default=None, help='Worker processes (default: all cores)')
+    args = parser.parse_args(argv)
+
+    results = quantify_batch(args.manifest, processes=args.processes)
+    results.to_csv(args.output, index=False)
+    print(f"Quantified {len(results)} bands; results saved to: {args.output}")
+
+
+if __name__ == '__main__':
+    main()
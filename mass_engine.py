@@ -0,0 +1,95 @@
+import numpy as np
+
+# Free amino acid masses (Da), as used by Bio.SeqUtils.molecular_weight
+AVERAGE_WEIGHTS = {
+    'A': 89.0932, 'C': 121.1582, 'D': 133.1027, 'E': 147.1293, 'F': 165.1891,
+    'G': 75.0666, 'H': 155.1546, 'I': 131.1729, 'K': 146.1876, 'L': 131.1729,
+    'M': 149.2113, 'N': 132.1179, 'O': 255.3134, 'P': 115.1305, 'Q': 146.1445,
+    'R': 174.201, 'S': 105.0926, 'T': 119.1192, 'U': 168.0532, 'V': 117.1463,
+    'W': 204.2252, 'Y': 181.1885,
+}
+MONOISOTOPIC_WEIGHTS = {
+    'A': 89.047678, 'C': 121.019749, 'D': 133.037508, 'E': 147.053158, 'F': 165.078979,
+    'G': 75.032028, 'H': 155.069477, 'I': 131.094629, 'K': 146.105528, 'L': 131.094629,
+    'M': 149.051049, 'N': 132.053492, 'O': 255.158292, 'P': 115.063329, 'Q': 146.069142,
+    'R': 174.111676, 'S': 105.042593, 'T': 119.058243, 'U': 168.964203, 'V': 117.078979,
+    'W': 204.089878, 'Y': 181.073893,
+}
+AVERAGE_WATER = 18.0153
+MONOISOTOPIC_WATER = 18.010565
+
+# Ambiguity codes are given the mean mass of the residues they stand for
+AMBIGUOUS_RESIDUES = {
+    'B': 'DN',
+    'Z': 'EQ',
+    'J': 'IL',
+    'X': 'ACDEFGHIKLMNPQRSTVWY',
+}
+
+# Columns of the count matrix: A-Z, then one column for any other character
+ALPHABET = 'ABCDEFGHIJKLMNOPQRSTUVWXYZ'
+OTHER_COLUMN = len(ALPHABET)
+CYSTEINE_COLUMN = ALPHABET.index('C')
+
+_BYTE_TO_COLUMN = np.full(256, OTHER_COLUMN, dtype=np.intp)
+for _column, _letter in enumerate(ALPHABET):
+    _BYTE_TO_COLUMN[ord(_letter)] = _column
+    _BYTE_TO_COLUMN[ord(_letter.lower())] = _column
+
+
+def _residue_mass_vector(weights, water):
+    """Per-column residue (in-chain) masses; unknown characters make the mass NaN."""
+    masses = np.full(len(ALPHABET) + 1, np.nan)
+    for column, letter in enumerate(ALPHABET):
+        if letter in weights:
+            masses[column] = weights[letter] - water
+        elif letter in AMBIGUOUS_RESIDUES:
+            masses[column] = np.mean([weights[aa] for aa in AMBIGUOUS_RESIDUES[letter]]) - water
+    return masses
+
+
+AVERAGE_RESIDUE_MASSES = _residue_mass_vector(AVERAGE_WEIGHTS, AVERAGE_WATER)
+MONOISOTOPIC_RESIDUE_MASSES = _residue_mass_vector(MONOISOTOPIC_WEIGHTS, MONOISOTOPIC_WATER)
+
+
+def count_matrix(sequences):
+    """Return an (n_sequences, 27) matrix of residue counts (A-Z, other)."""
+    sequences = list(sequences)
+    lengths = np.fromiter((len(sequence) for sequence in sequences), dtype=np.intp, count=len(sequences))
+    codes = np.frombuffer(''.join(sequences).encode('ascii', errors='replace'), dtype=np.uint8)
+    rows = np.repeat(np.arange(len(sequences)), lengths)
+    flat = rows * (OTHER_COLUMN + 1) + _BYTE_TO_COLUMN[codes]
+    counts = np.bincount(flat, minlength=len(sequences) * (OTHER_COLUMN + 1))
+    return counts.reshape(len(sequences), OTHER_COLUMN + 1)
+
+
+def masses_from_counts(counts, monoisotopic=False):
+    """Molecular masses (Da) of the proteins in a count matrix, with one matrix product."""
+    if monoisotopic:
+        residue_masses, water = MONOISOTOPIC_RESIDUE_MASSES, MONOISOTOPIC_WATER
+    else:
+        residue_masses, water = AVERAGE_RESIDUE_MASSES, AVERAGE_WATER
+    unknown = np.isnan(residue_masses)
+    masses = counts @ np.where(unknown, 0, residue_masses) + water
+    masses[counts[:, unknown].any(axis=1)] = np.nan
+    masses[counts.sum(axis=1) == 0] = 0
+    return masses
+
+
+def sequence_masses(sequences):
+    """Cysteine counts and average/monoisotopic masses (kDa) for a batch of sequences.
+
+    Returns a dict of NumPy arrays keyed 'cysteines', 'average_mass' and
+    'monoisotopic_mass'.
+    """
+    counts = count_matrix(sequences)
+    return {
+        'cysteines': counts[:, CYSTEINE_COLUMN],
+        'average_mass': masses_from_counts(counts) / 1000,
+        'monoisotopic_mass': masses_from_counts(counts, monoisotopic=True) / 1000,
+    }
+
+
+def molecular_mass(sequence, monoisotopic=False):
+    """Molecular mass (kDa) of a single protein sequence."""
+    return float(masses_from_counts(count_matrix([sequence]), monoisotopic=monoisotopic)[0] / 1000)
@@ -0,0 +1,280 @@
+import argparse
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from binomial import log_pascal_row
+from parallel import bounded_map
+
+# Explicit per-cysteine sampling draws one random number per cysteine per
+# molecule; above this many molecules band counts are drawn from the exact
+# multinomial instead (its cost does not depend on the population size)
+EXPLICIT_LIMIT = 10 ** 8
+EXPLICIT_CHUNK = 2 ** 20
+MULTINOMIAL_CHUNKS = 64
+# NumPy draws counts as int64, so larger chunks are drawn in pieces of at most this many molecules
+MAX_DRAW = 2 ** 62
+# Random numbers held at once within a chunk (32 MB of float64)
+BLOCK_ELEMENTS = 2 ** 22
+
+
+def site_probabilities(num_cysteines=None, percent_oxidation=None, site_percentages=None):
+    """Per-cysteine oxidation probabilities from a mean % oxidation or site-specific percentages."""
+    if site_percentages is not None:
+        probabilities = np.asarray(site_percentages, dtype=float) / 100
+        if num_cysteines is not None and len(probabilities) != num_cysteines:
+            raise ValueError(f"Got {len(probabilities)} site percentages for {num_cysteines} cysteines")
+    elif num_cysteines is not None and percent_oxidation is not None:
+        probabilities = np.full(int(num_cysteines), percent_oxidation / 100)
+    else:
+        raise ValueError("Give site_percentages, or num_cysteines and percent_oxidation")
+    if np.any((probabilities < 0) | (probabilities > 1)):
+        raise ValueError("Oxidation percentages must lie between 0 and 100")
+    return probabilities
+
+
+def band_probabilities(probabilities):
+    """Exact probability of each band (0..n cysteines oxidised) for independent sites.
+
+    Equal sites give the binomial distribution (computed in log space so large
+    n does not overflow); site-specific ones the Poisson binomial, built by
+    folding in one cysteine at a time.
+    """
+    probabilities = np.asarray(probabilities, dtype=float)
+    n = len(probabilities)
+    if n and np.all(probabilities == probabilities[0]) and 0 < probabilities[0] < 1:
+        p = probabilities[0]
+        k = np.arange(n + 1)
+        return np.exp(log_pascal_row(n) + k * np.log(p) + (n - k) * np.log1p(-p))
+    pmf = np.ones(1)
+    for p in probabilities:
+        pmf = np.concatenate((pmf * (1 - p), [0.0])) + np.concatenate(([0.0], pmf * p))
+    return pmf
+
+
+def chunk_sizes(num_molecules, chunk_size):
+    """Lazily yield the number of molecules in each chunk."""
+    full, remainder = divmod(int(num_molecules), int(chunk_size))
+    for _ in range(full):
+        yield int(chunk_size)
+    if remainder:
+        yield remainder
+
+
+def _chunk_rng(seed, index):
+    # The index-th child of SeedSequence(seed).spawn(), made without spawning
+    # all the others, so every chunk has its own stream whatever the worker count
+    return np.random.default_rng(np.random.SeedSequence(seed, spawn_key=(index,)))
+
+
+def _simulate_chunk(job):
+    """(band counts, oxidised counts per site) for one chunk of molecules."""
+    probabilities, size, seed, index, explicit = job
+    rng = _chunk_rng(seed, index)
+    n = len(probabilities)
+    if not explicit:
+        # Band counts are exactly multinomial; site counts keep the correct marginals
+        pmf = band_probabilities(probabilities)
+        band_counts = np.zeros(n + 1, dtype=object)
+        site_counts = np.zeros(n, dtype=object)
+        for draw in chunk_sizes(size, MAX_DRAW):
+            band_counts += rng.multinomial(draw, pmf).astype(object)
+            site_counts += rng.binomial(draw, probabilities).astype(object)
+        return band_counts, site_counts
+
+    band_counts = np.zeros(n + 1, dtype=np.int64)
+    site_counts = np.zeros(n, dtype=np.int64)
+    block = max(1, BLOCK_ELEMENTS // max(n, 1))
+    for start in range(0, size, block):
+        # One row per molecule, one column per cysteine: True where oxidised
+        states = rng.random((min(block, size - start), n)) < probabilities
+        band_counts += np.bincount(states.sum(axis=1), minlength=n + 1)
+        site_counts += states.sum(axis=0)
+    return band_counts, site_counts
+
+
+def iter_occupancy(probabilities, num_molecules, seed=None, method='auto', chunk_size=None, processes=1):
+    """Simulate a population chunk by chunk, yielding the running totals after each chunk.
+
+    method is 'explicit' (draw every cysteine of every molecule), 'multinomial'
+    (draw each chunk's band counts at once, for populations of any size) or
+    'auto' (explicit up to EXPLICIT_LIMIT molecules). Memory stays bounded by
+    the chunk size, and the same seed gives the same result for any number of
+    processes. Each yielded dict holds the molecules simulated so far and the
+    band and per-site counts (exact Python ints, so populations beyond the
+    int64 range add up correctly) and fractions.
+    """
+    probabilities = np.asarray(probabilities, dtype=float)
+    num_molecules = int(num_molecules)
+    if method == 'auto':
+        method = 'explicit' if num_molecules <= EXPLICIT_LIMIT else 'multinomial'
+    if method not in ('explicit', 'multinomial'):
+        raise ValueError(f"Unknown method: {method}")
+    explicit = method == 'explicit'
+    if chunk_size is None:
+        chunk_size = EXPLICIT_CHUNK if explicit else max(1, -(-num_molecules // MULTINOMIAL_CHUNKS))
+    # Record the entropy drawn for seed=None so the run can be repeated
+    seed = np.random.SeedSequence(seed).entropy
+
+    jobs = ((probabilities, size, seed, index, explicit)
+            for index, size in enumerate(chunk_sizes(num_molecules, chunk_size)))
+    band_counts = [0] * (len(probabilities) + 1)
+    site_counts = [0] * len(probabilities)
+    simulated = 0
+
+    def totals():
+        return {
+            'seed': seed,
+            'method': method,
+            'molecules': simulated,
+            'band_counts': np.array(band_counts, dtype=object),
+            'band_fractions': np.array([count / simulated for count in band_counts]),
+            'site_counts': np.array(site_counts, dtype=object),
+            'site_fractions': np.array([count / simulated for count in site_counts]),
+        }
+
+    def accumulate(results):
+        nonlocal simulated
+        for chunk_bands, chunk_sites in results:
+            band_counts[:] = [total + int(count) for total, count in zip(band_counts, chunk_bands)]
+            site_counts[:] = [total + int(count) for total, count in zip(site_counts, chunk_sites)]
+            simulated += sum(int(count) for count in chunk_bands)
+            yield totals()
+
+    if processes == 1:
+        yield from accumulate(map(_simulate_chunk, jobs))
+        return
+    with ProcessPoolExecutor(max_workers=processes) as executor:
+        max_pending = 2 * (processes or os.cpu_count() or 1)
+        yield from accumulate(bounded_map(executor, _simulate_chunk, jobs, max_pending))
+
+
+def simulate_occupancy(probabilities, num_molecules, **options):
+    """Final totals of iter_occupancy, plus the exact band probabilities for reference."""
+    result = None
+    for result in iter_occupancy(probabilities, num_molecules, **options):
+        pass
+    if result is None:
+        raise ValueError("num_molecules must be positive")
+    result['expected_fractions'] = band_probabilities(probabilities)
+    return result
+
+
+def compare_fractions(predicted, measured):
+    """Distances between predicted and measured band fractions (each renormalised to sum to 1).
+
+    Returns total variation distance, Hellinger distance, the largest per-band
+    difference and the Jensen-Shannon divergence (in bits).
+    """
+    predicted = np.asarray(predicted, dtype=float)
+    measured = np.asarray(measured, dtype=float)
+    if len(predicted) != len(measured):
+        raise ValueError(f"Got {len(measured)} measured bands for {len(predicted)} predicted ones")
+    p = predicted / predicted.sum()
+    q = np.clip(measured, 0, None)
+    q = q / q.sum()
+    m = (p + q) / 2
+    with np.errstate(divide='ignore', invalid='ignore'):
+        js = 0.5 * (np.nansum(p * np.log2(p / m)) + np.nansum(q * np.log2(q / m)))
+    return {
+        'total_variation': float(0.5 * np.abs(p - q).sum()),
+        'hellinger': float(np.sqrt(0.5 * np.sum((np.sqrt(p) - np.sqrt(q)) ** 2))),
+        'max_band_difference': float(np.abs(p - q).max()),
+        'jensen_shannon_bits': float(js),
+    }
+
+
+def occupancy_table(result, measured=None):
+    """One row per band: simulated counts and fractions with Monte Carlo standard errors."""
+    fractions = result['band_fractions']
+    table = pd.DataFrame({
+        'band': np.arange(len(fractions)),
+        'simulated_count': result['band_counts'],
+        'simulated_fraction': fractions,
+        'standard_error': np.sqrt(fractions * (1 - fractions) / result['molecules']),
+        'expected_fraction': result['expected_fractions'],
+    })
+    if measured is not None:
+        table['measured_fraction'] = measured
+    return table
+
+
+def compare_lanes(results, num_molecules=10 ** 6, percent_oxidation=None, seed=None, **options):
+    """Simulate each lane of a densitometry result and compare with its measured band fractions.
+
+    results is the per-band output of densitometry.quantify_batch (a DataFrame
+    or CSV path). Each lane is simulated at its own measured mean % oxidation
+    (or at percent_oxidation, if given) with equal, independent sites, so a
+    large distance points to site-specific or cooperative oxidation. Returns
+    one row per lane.
+    """
+    from densitometry import summarise_lanes
+
+    if not isinstance(results, pd.DataFrame):
+        results = pd.read_csv(results)
+    lanes = summarise_lanes(results)
+    rows = []
+    for index, lane in enumerate(lanes.to_dict('records')):
+        measured = np.asarray(lane.pop('fractions'), dtype=float)
+        percent = lane['mean_oxidation_percent'] if percent_oxidation is None else percent_oxidation
+        probabilities = site_probabilities(len(measured) - 1, percent)
+        # A distinct, reproducible stream per lane
+        lane_seed = None if seed is None else [seed, index]
+        simulated = simulate_occupancy(probabilities, num_molecules, seed=lane_seed, **options)
+        rows.append({
+            **lane,
+            'simulated_percent': percent,
+            'molecules': simulated['molecules'],
+            **compare_fractions(simulated['band_fractions'], measured),
+            'expected_total_variation': compare_fractions(simulated['expected_fractions'],
+                                                          measured)['total_variation'],
+        })
+    return pd.DataFrame(rows)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Monte Carlo simulation of Cleland band occupancy.')
+    parser.add_argument('--cysteines', type=int, help='Number of cysteines (with --percent)')
+    parser.add_argument('--percent', type=float, help='Mean %% oxidation of every cysteine')
+    parser.add_argument('--sites', type=float, nargs='+', help='Site-specific %% oxidation of each cysteine')
+    parser.add_argument('--molecules', type=float, default=1e6, help='Population size (e.g. 2.9e16)')
+    parser.add_argument('--method', choices=('auto', 'explicit', 'multinomial'), default='auto')
+    parser.add_argument('--chunk-size', type=int, default=None, help='Molecules per chunk')
+    parser.add_argument('--seed', type=int, default=None, help='Seed for a reproducible run')
+    parser.add_argument('--processes', type=int, default=1, help='Worker processes for the chunks')
+    parser.add_argument('--measured', help='Per-band densitometry CSV to compare each lane against')
+    parser.add_argument('--output', help='CSV file for the band (or, with --measured, lane) table')
+    args = parser.parse_args(argv)
+    options = {'method': args.method, 'chunk_size': args.chunk_size, 'processes': args.processes}
+    num_molecules = int(args.molecules)
+
+    if args.measured:
+        table = compare_lanes(args.measured, num_molecules, args.percent, args.seed, **options)
+        print(table.to_string(index=False))
+    else:
+        probabilities = site_probabilities(args.cysteines, args.percent, args.sites)
+        # Report convergence roughly every tenth of the population
+        step = max(1, num_molecules // 10)
+        next_report = step
+        expected = band_probabilities(probabilities)
+        result = None
+        for result in iter_occupancy(probabilities, num_molecules, seed=args.seed, **options):
+            if result['molecules'] >= next_report:
+                next_report = (result['molecules'] // step + 1) * step
+                distance = compare_fractions(expected, result['band_fractions'])['total_variation']
+                print(f"{result['molecules']:.4g} molecules: total variation from exact {distance:.3g}")
+        if result is None:
+            parser.error("--molecules must be at least 1")
+        result['expected_fractions'] = expected
+        table = occupancy_table(result)
+        print(table.to_string(index=False))
+        print(f"Seed: {result['seed']} ({result['method']} sampling)")
+    if args.output:
+        table.to_csv(args.output, index=False)
+        print(f"Results saved to: {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,136 @@
+import math
+from fractions import Fraction
+from functools import reduce
+
+import numpy as np
+import pandas as pd
+
+
+def _integer_units(values, target_mean, num_molecules):
+    """Express the state values and the target total in the smallest common integer unit.
+
+    Values are shifted so the lowest state is 0. Returns (units, target_total),
+    with target_total None when the target mean cannot be hit exactly.
+    """
+    fractions = [Fraction(value).limit_denominator(10 ** 6) for value in values]
+    target = Fraction(target_mean).limit_denominator(10 ** 6) * num_molecules
+    lowest = min(fractions)
+    shifted = [value - lowest for value in fractions]
+    target -= lowest * num_molecules
+
+    denominator = reduce(math.lcm, [value.denominator for value in shifted], 1)
+    units = [int(value * denominator) for value in shifted]
+    step = reduce(math.gcd, units, 0) or 1
+    units = [unit // step for unit in units]
+    target_total = target * denominator / step
+    if target_total.denominator != 1 or target_total < 0:
+        return units, None
+    return units, int(target_total)
+
+
+def _shift(row, offset):
+    """row shifted right by offset along the oxidation-sum axis (zero filled)."""
+    if offset == 0:
+        return row
+    shifted = np.zeros_like(row)
+    if offset < len(row):
+        shifted[offset:] = row[:-offset]
+    return shifted
+
+
+def _add_state(previous, unit, max_count, num_molecules):
+    """Fold one more state into a (molecules, oxidation sum) table of composition counts."""
+    table = np.zeros_like(previous)
+    boolean = previous.dtype == bool
+    for n in range(num_molecules + 1):
+        if boolean and max_count is not None:
+            row = previous[n].copy()
+            for count in range(1, min(n, max_count) + 1):
+                row |= _shift(previous[n - count], count * unit)
+            table[n] = row
+            continue
+        row = previous[n].copy()
+        if n > 0:
+            # Compositions using at least one molecule of this state
+            row = row | _shift(table[n - 1], unit) if boolean else row + _shift(table[n - 1], unit)
+        if max_count is not None and n > max_count:
+            # ...minus those using more than max_count of it
+            row -= _shift(previous[n - max_count - 1], (max_count + 1) * unit)
+        table[n] = row
+    return table
+
+
+def _suffix_tables(units, num_molecules, target_total, max_count, dtype):
+    """tables[j][n, s]: compositions of n molecules with oxidation sum s over states j..end."""
+    last = np.zeros((num_molecules + 1, target_total + 1), dtype=dtype)
+    last[0, 0] = 1
+    tables = [last]
+    for unit in reversed(units):
+        tables.append(_add_state(tables[-1], unit, max_count, num_molecules))
+    return tables[::-1]
+
+
+def count_solutions(values, num_molecules, target_mean, max_count=None):
+    """Number of ways to distribute num_molecules over the states so their mean value is target_mean.
+
+    values are the oxidation levels of each proteoform state (e.g. 0, 20, ..., 100)
+    and max_count optionally caps the number of molecules in any one state.
+    The count is exact (a Python int) and is found by dynamic programming
+    without enumerating any compositions.
+    """
+    units, target_total = _integer_units(values, target_mean, num_molecules)
+    if target_total is None:
+        return 0
+    # Exact Python integers once the count could overflow int64
+    bound = math.comb(num_molecules + len(units) - 1, len(units) - 1)
+    dtype = np.int64 if bound < 2 ** 62 else object
+    table = np.zeros((num_molecules + 1, target_total + 1), dtype=dtype)
+    table[0, 0] = 1
+    for unit in units:
+        table = _add_state(table, unit, max_count, num_molecules)
+    return int(table[num_molecules, target_total])
+
+
+def iter_solutions(values, num_molecules, target_mean, max_count=None):
+    """Stream every composition (a tuple of counts per state) matching target_mean.
+
+    Solutions come out in lexicographic order, as itertools.product would list
+    them. A reachability table prunes every branch that cannot complete, so the
+    work done is proportional to the number of solutions.
+    """
+    units, target_total = _integer_units(values, target_mean, num_molecules)
+    if target_total is None:
+        return
+    reachable = _suffix_tables(units, num_molecules, target_total, max_count, bool)
+    if not reachable[0][num_molecules, target_total]:
+        return
+
+    limit = num_molecules if max_count is None else max_count
+    counts = [0] * len(units)
+
+    def extend(state, molecules, total):
+        if state == len(units):
+            yield tuple(counts)
+            return
+        unit = units[state]
+        following = reachable[state + 1]
+        for count in range(min(molecules, limit) + 1):
+            if count * unit > total:
+                break
+            if following[molecules - count, total - count * unit]:
+                counts[state] = count
+                yield from extend(state + 1, molecules - count, total - count * unit)
+        counts[state] = 0
+
+    yield from extend(0, num_molecules, target_total)
+
+
+def solutions_frame(proteoforms, num_molecules, target_mean, max_count=None, limit=None):
+    """DataFrame of solutions with one column per proteoform (a {name: oxidation %} dict).
+
+    limit stops after that many solutions.
+    """
+    solutions = iter_solutions(list(proteoforms.values()), num_molecules, target_mean, max_count)
+    if limit is not None:
+        solutions = (solution for _, solution in zip(range(limit), solutions))
+    return pd.DataFrame(list(solutions), columns=list(proteoforms.keys()))
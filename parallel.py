@@ -0,0 +1,12 @@
+from collections import deque
+
+
+def bounded_map(executor, fn, iterable, max_pending):
+    """Like executor.map, but never holds more than max_pending submitted tasks."""
+    pending = deque()
+    for item in iterable:
+        pending.append(executor.submit(fn, item))
+        if len(pending) >= max_pending:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
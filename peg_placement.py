@@ -0,0 +1,253 @@
+import argparse
+import gzip
+import os
+
+import numpy as np
+import pandas as pd
+
+# Residue name and chain used for the attached PEG copies
+PEG_RESIDUE_NAME = 'PEG'
+PEG_CHAIN_ID = 'P'
+
+# S-C bond between the cysteine SG and the PEG-maleimide anchor atom (Angstrom)
+S_C_BOND_LENGTH = 1.82
+
+# Atoms closer than this (Angstrom) count as a clash
+CLASH_DISTANCE = 2.5
+
+# Orientations tried for each PEG: tilts away from the CA->SG axis (degrees) x azimuths
+DEFAULT_TILTS = (0, 30, 60)
+DEFAULT_AZIMUTHS = 6
+
+_HETATM = 'HETATM{:5d} {:4s} {:3s} {:1s}{:4d}    {:8.3f}{:8.3f}{:8.3f}{:6.2f}{:6.2f}          {:>2s}\n'
+
+
+def parse_structure(path, structure_id=None, data=None):
+    """Parse a PDB or mmCIF file (optionally gzipped) with Biopython.
+
+    data optionally gives the raw file contents (e.g. a tarball member), in
+    which case path is only used for its name.
+    """
+    import io
+
+    from Bio.PDB import MMCIFParser, PDBParser
+
+    path = str(path)
+    name = path[:-3] if path.endswith('.gz') else path
+    parser = MMCIFParser(QUIET=True) if name.lower().endswith(('.cif', '.mmcif')) else PDBParser(QUIET=True)
+    structure_id = structure_id or os.path.basename(name).split('.')[0]
+    if data is not None:
+        if path.endswith('.gz'):
+            data = gzip.decompress(data)
+        return parser.get_structure(structure_id, io.StringIO(data.decode()))
+    if path.endswith('.gz'):
+        with gzip.open(path, 'rt') as handle:
+            return parser.get_structure(structure_id, handle)
+    return parser.get_structure(structure_id, path)
+
+
+def rotations_between(sources, targets):
+    """Rotation matrices (..., 3, 3) taking unit vectors sources onto unit vectors targets (Rodrigues)."""
+    sources, targets = np.broadcast_arrays(np.asarray(sources, dtype=np.float64),
+                                           np.asarray(targets, dtype=np.float64))
+    v = np.cross(sources, targets)
+    c = np.einsum('...i,...i->...', sources, targets)
+    vx = np.zeros(v.shape[:-1] + (3, 3))
+    vx[..., 0, 1], vx[..., 0, 2], vx[..., 1, 2] = -v[..., 2], v[..., 1], -v[..., 0]
+    vx[..., 1, 0], vx[..., 2, 0], vx[..., 2, 1] = v[..., 2], -v[..., 1], v[..., 0]
+    opposite = c < -1 + 1e-9
+    scale = np.where(opposite, 0, 1 / np.where(opposite, 1, 1 + c))
+    rotations = np.eye(3) + vx + vx @ vx * scale[..., None, None]
+    if np.any(opposite):
+        # Half turn about any axis perpendicular to the source
+        s = sources[opposite]
+        helper = np.where(np.abs(s[:, :1]) < 0.9, [[1.0, 0, 0]], [[0, 1.0, 0]])
+        axis = np.cross(s, helper)
+        axis /= np.linalg.norm(axis, axis=1, keepdims=True)
+        rotations[opposite] = 2 * axis[:, :, None] * axis[:, None, :] - np.eye(3)
+    return rotations
+
+
+def load_peg_template(path):
+    """PEG atoms as arrays, in a frame with the anchor (first) atom at the origin and the chain along +z.
+
+    The chain axis runs from the anchor to the centroid of the molecule, so
+    placing the template along a direction points the bulk of the PEG that way.
+    """
+    structure = parse_structure(path, 'PEG')
+    atoms = list(next(structure.get_chains()).get_atoms())
+    coords = np.array([atom.coord for atom in atoms], dtype=np.float64)
+    coords -= coords[0]
+    axis = coords.mean(axis=0)
+    length = np.linalg.norm(axis)
+    if length > 0:
+        coords = coords @ rotations_between(axis / length, [0, 0, 1]).T
+    return {
+        'coords': coords,
+        'names': [atom.get_fullname() for atom in atoms],
+        'elements': [atom.element or '' for atom in atoms],
+        'bfactors': np.array([atom.bfactor for atom in atoms]),
+        'occupancies': np.array([atom.occupancy if atom.occupancy is not None else 1.0 for atom in atoms]),
+    }
+
+
+def find_cysteines(structure):
+    """Cysteines of the first model that have both CA and SG atoms, with their coordinates."""
+    residues = [residue for residue in structure[0].get_residues()
+                if residue.get_resname() == 'CYS' and 'CA' in residue and 'SG' in residue]
+    return {
+        'residues': residues,
+        'ca': np.array([residue['CA'].coord for residue in residues], dtype=np.float64).reshape(-1, 3),
+        'sg': np.array([residue['SG'].coord for residue in residues], dtype=np.float64).reshape(-1, 3),
+    }
+
+
+def candidate_directions(axes, tilts=DEFAULT_TILTS, azimuths=DEFAULT_AZIMUTHS):
+    """Unit directions (m, k, 3) around each axis: the axis itself, then cones at each non-zero tilt."""
+    axes = axes / np.linalg.norm(axes, axis=-1, keepdims=True)
+    local = [[0.0, 0.0, 1.0]] if 0 in tilts else []
+    for tilt in np.radians([tilt for tilt in tilts if tilt]):
+        phi = np.arange(azimuths) * 2 * np.pi / azimuths
+        local.extend(np.column_stack((np.sin(tilt) * np.cos(phi), np.sin(tilt) * np.sin(phi),
+                                      np.full(azimuths, np.cos(tilt)))))
+    local = np.array(local)
+    to_axes = rotations_between(np.array([0.0, 0.0, 1.0]), axes)
+    return np.einsum('mij,kj->mki', to_axes, local)
+
+
+def _own_residue_coords(residues):
+    # Atoms of each cysteine itself, NaN-padded; the PEG is bonded to them so they never count as clashes
+    atoms = [[atom.coord for atom in residue.get_atoms()] for residue in residues]
+    width = max((len(coords) for coords in atoms), default=0)
+    padded = np.full((len(atoms), width, 3), np.nan)
+    for i, coords in enumerate(atoms):
+        padded[i, :len(coords)] = coords
+    return padded
+
+
+def place_pegs(structure, template, clash_distance=CLASH_DISTANCE, bond_length=S_C_BOND_LENGTH,
+               tilts=DEFAULT_TILTS, azimuths=DEFAULT_AZIMUTHS):
+    """Attach one PEG per cysteine, pointing along CA->SG and tilted away from clashes where needed.
+
+    All candidate orientations of all cysteines are transformed at once and
+    scored against a KD-tree of the protein atoms. Cysteines are then placed in
+    order, each taking the orientation with the fewest clashes with the
+    protein and the PEGs already placed (ties go to the straightest). Returns
+    a dict with the PEG coordinates (m, atoms, 3), per-cysteine details and
+    peg_clash_pairs, the number of distinct clashing PEG-PEG atom pairs.
+    """
+    from scipy.spatial import cKDTree
+
+    cysteines = find_cysteines(structure)
+    residues, ca, sg = cysteines['residues'], cysteines['ca'], cysteines['sg']
+    num_cys, num_atoms = len(residues), len(template['coords'])
+    if num_cys == 0:
+        return {'residues': [], 'coords': np.empty((0, num_atoms, 3)), 'directions': np.empty((0, 3)),
+                'tilt_degrees': np.empty(0), 'protein_clashes': np.empty(0, dtype=int),
+                'peg_clashes': np.empty(0, dtype=int), 'peg_clash_pairs': 0}
+
+    directions = candidate_directions(sg - ca, tilts, azimuths)
+    num_candidates = directions.shape[1]
+    rotations = rotations_between(np.array([0.0, 0.0, 1.0]), directions)
+    anchors = sg[:, None, :] + bond_length * directions
+    # (m, k, atoms, 3)
+    candidates = anchors[:, :, None, :] + np.einsum('mkij,aj->mkai', rotations, template['coords'])
+
+    protein = np.array([atom.coord for atom in structure[0].get_atoms()], dtype=np.float64)
+    counts = cKDTree(protein).query_ball_point(candidates.reshape(-1, 3), clash_distance, return_length=True)
+    clashes = counts.reshape(num_cys, num_candidates, num_atoms).sum(axis=2)
+    for i, own in enumerate(_own_residue_coords(residues)):
+        own_distances = np.linalg.norm(candidates[i, :, :, None, :] - own, axis=-1)
+        clashes[i] -= (own_distances <= clash_distance).sum(axis=(1, 2))
+
+    chosen = np.zeros(num_cys, dtype=int)
+    placed = []
+    for i in range(num_cys):
+        score = clashes[i].copy()
+        if placed:
+            near = cKDTree(np.concatenate(placed)).query_ball_point(
+                candidates[i].reshape(-1, 3), clash_distance, return_length=True)
+            score += near.reshape(num_candidates, num_atoms).sum(axis=1)
+        chosen[i] = np.argmin(score)
+        placed.append(candidates[i, chosen[i]])
+
+    coords = np.stack(placed)
+    # Final PEG-PEG contacts, counted for both copies involved
+    pairs = cKDTree(coords.reshape(-1, 3)).query_pairs(clash_distance, output_type='ndarray')
+    copies = pairs // num_atoms
+    between = copies[copies[:, 0] != copies[:, 1]]
+    peg_clashes = np.bincount(between.ravel(), minlength=num_cys)
+
+    return {
+        'residues': residues,
+        'coords': coords,
+        'directions': directions[np.arange(num_cys), chosen],
+        'tilt_degrees': np.round(np.degrees(np.arccos(np.clip(np.einsum(
+            'mi,mi->m', directions[np.arange(num_cys), chosen], directions[:, 0]), -1, 1))), 1),
+        'protein_clashes': clashes[np.arange(num_cys), chosen],
+        'peg_clashes': peg_clashes,
+        'peg_clash_pairs': len(between),
+    }
+
+
+def placement_table(placement):
+    """One row per PEGylated cysteine."""
+    residues = placement['residues']
+    return pd.DataFrame({
+        'chain': [residue.get_parent().id for residue in residues],
+        'residue_number': [residue.id[1] for residue in residues],
+        'tilt_degrees': placement['tilt_degrees'],
+        'protein_clashes': placement['protein_clashes'],
+        'peg_clashes': placement['peg_clashes'],
+    })
+
+
+def write_pegylated_pdb(structure, template, placement, output_path):
+    """Write the protein followed by all PEG copies as HETATM records of chain P.
+
+    The protein is written with a single PDBIO call and the PEG atoms are
+    formatted straight from the coordinate array, without building Bio.PDB
+    Atom objects.
+    """
+    from Bio.PDB import PDBIO
+
+    num_atoms = len(template['names'])
+    first_serial = sum(1 for _ in structure.get_atoms()) + 1
+    coords = placement['coords'].reshape(-1, 3)
+    with open(output_path, 'w') as handle:
+        io = PDBIO()
+        io.set_structure(structure)
+        io.save(handle, write_end=False)
+        handle.writelines(
+            _HETATM.format((first_serial + n) % 100000, template['names'][n % num_atoms], PEG_RESIDUE_NAME,
+                           PEG_CHAIN_ID, (n // num_atoms + 1) % 10000, x, y, z,
+                           template['occupancies'][n % num_atoms], template['bfactors'][n % num_atoms],
+                           template['elements'][n % num_atoms])
+            for n, (x, y, z) in enumerate(coords.tolist()))
+        handle.write('END\n')
+
+
+def pegylate(structure_path, peg_path, output_path, **options):
+    """Attach PEG to every cysteine of a structure file and save the result; returns placement_table."""
+    structure = parse_structure(structure_path)
+    template = load_peg_template(peg_path)
+    placement = place_pegs(structure, template, **options)
+    write_pegylated_pdb(structure, template, placement, output_path)
+    return placement_table(placement)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Attach a PEG model to every cysteine of a protein structure.')
+    parser.add_argument('structure', help='Protein structure (.pdb or .cif, optionally .gz)')
+    parser.add_argument('peg', help='PEG template PDB; its first atom is bonded to the cysteine SG')
+    parser.add_argument('output', help='Output PDB file')
+    parser.add_argument('--clash-distance', type=float, default=CLASH_DISTANCE, help='Clash cutoff (Angstrom)')
+    args = parser.parse_args(argv)
+
+    table = pegylate(args.structure, args.peg, args.output, clash_distance=args.clash_distance)
+    print(table.to_string(index=False))
+    print(f"PEG attached to {len(table)} cysteines; saved as: {args.output}")
+
+
+if __name__ == '__main__':
+    main()
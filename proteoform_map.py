@@ -1,39 +1,147 @@
-# Install the necessary libraries 
+import math
+import os
 
 import numpy as np
 import matplotlib.pyplot as plt
-import seaborn as sns
-from itertools import combinations
+from PIL import Image
+
+from binomial import pascal_row
+
+# Pixel values used in the rendered map (same look as the "Greys" heatmap)
+REDUCED_PIXEL = 255
+OXIDISED_PIXEL = 0
+GRIDLINE_PIXEL = 128
+
+
+def _binomial_table(num_cysteines):
+    # table[a, b + 1] = C(a, b), with an extra leading column so that C(a, -1) = 0
+    table = np.zeros((num_cysteines + 1, num_cysteines + 2), dtype=np.int64)
+    for a in range(num_cysteines + 1):
+        table[a, 1:a + 2] = pascal_row(a)
+    return table
+
+
+def _unrank_band(num_cysteines, oxidised, ranks, table):
+    """Vectorized combinatorial unranking of many proteoforms of one band at once."""
+    ranks = ranks.astype(np.int64)
+    remaining = np.full(len(ranks), oxidised, dtype=np.int64)
+    bits = np.zeros((len(ranks), num_cysteines), dtype=np.uint8)
+    for site in range(num_cysteines):
+        with_site = table[num_cysteines - site - 1, remaining]
+        selected = ranks < with_site
+        bits[:, site] = selected
+        remaining -= selected
+        ranks -= np.where(selected, 0, with_site)
+    return bits
+
+
+def _unpack_codes(codes, num_cysteines):
+    # Site 0 is the most significant bit, matching the column order of the band ordering
+    shifts = np.arange(num_cysteines - 1, -1, -1, dtype=np.uint64)
+    return ((codes.astype(np.uint64)[:, None] >> shifts) & np.uint64(1)).astype(np.uint8)
+
+
+def proteoform_matrix(num_cysteines, start=0, stop=None, order='band'):
+    """Return rows start..stop of the proteoform map as a (rows, num_cysteines) 0/1 uint8 matrix.
+
+    order='band' lists proteoforms band by band (0 oxidised cysteines first),
+    in the same order as the original itertools.combinations enumeration;
+    order='gray' lists them as a Gray code, so neighbouring rows differ by one
+    site; order='binary' lists them by integer value.
+    """
+    total = 2 ** num_cysteines
+    stop = total if stop is None else min(stop, total)
+    if num_cysteines > 62:
+        raise ValueError("proteoform maps are limited to 62 cysteines")
+    if order in ('gray', 'binary'):
+        codes = np.arange(start, stop, dtype=np.uint64)
+        if order == 'gray':
+            codes ^= codes >> np.uint64(1)
+        return _unpack_codes(codes, num_cysteines)
+    if order != 'band':
+        raise ValueError(f"Unknown proteoform order: {order!r}")
+
+    table = _binomial_table(num_cysteines)
+    blocks = []
+    band_start = 0
+    for oxidised in range(num_cysteines + 1):
+        band_stop = band_start + math.comb(num_cysteines, oxidised)
+        lo, hi = max(start, band_start), min(stop, band_stop)
+        if lo < hi:
+            ranks = np.arange(lo - band_start, hi - band_start, dtype=np.int64)
+            blocks.append(_unrank_band(num_cysteines, oxidised, ranks, table))
+        band_start = band_stop
+    if not blocks:
+        return np.zeros((0, num_cysteines), dtype=np.uint8)
+    return np.concatenate(blocks)
+
+
+def packed_proteoforms(num_cysteines, start=0, stop=None, order='band'):
+    """Like proteoform_matrix, but bit-packed along the sites (np.packbits, 8 sites per byte)."""
+    return np.packbits(proteoform_matrix(num_cysteines, start, stop, order), axis=1)
+
+
+def rasterize(matrix, cell_size=1, gridlines=False):
+    """Turn a 0/1 proteoform matrix into a greyscale image, cell_size pixels per site."""
+    image = np.where(matrix.astype(bool), OXIDISED_PIXEL, REDUCED_PIXEL).astype(np.uint8)
+    if cell_size > 1:
+        image = np.repeat(np.repeat(image, cell_size, axis=0), cell_size, axis=1)
+        if gridlines and cell_size >= 3:
+            image[cell_size - 1::cell_size, :] = GRIDLINE_PIXEL
+            image[:, cell_size - 1::cell_size] = GRIDLINE_PIXEL
+    return image
+
+
+def render_proteoform_map(num_cysteines, output_path, order='band', cell_size=4, gridlines=True, tile_rows=65536):
+    """Write the proteoform map straight to PNG, tile_rows proteoforms per image.
+
+    Only one tile is held in memory at a time. When more than one tile is
+    needed the files are named <stem>_tile0000.png, <stem>_tile0001.png, ...
+    Returns the list of files written.
+    """
+    total = 2 ** num_cysteines
+    stem, extension = os.path.splitext(str(output_path))
+    num_tiles = math.ceil(total / tile_rows)
+    paths = []
+    for tile in range(num_tiles):
+        matrix = proteoform_matrix(num_cysteines, tile * tile_rows, (tile + 1) * tile_rows, order)
+        path = output_path if num_tiles == 1 else f'{stem}_tile{tile:04d}{extension or ".png"}'
+        # A 2-D uint8 array is saved as single-channel 8-bit greyscale ('L'), with no colormap pass
+        Image.fromarray(rasterize(matrix, cell_size, gridlines)).save(path)
+        paths.append(path)
+    return paths
+
+
+def plot_proteoform_map(num_cysteines, output_path, order='band', dpi=300):
+    """Save an annotated map (title and axes) drawn as one image plus two line collections."""
+    matrix = proteoform_matrix(num_cysteines, order=order)
+    rows = matrix.shape[0]
+
+    fig, ax = plt.subplots(figsize=(12, min(60, max(4, rows / 17))))
+    ax.imshow(rasterize(matrix), cmap='gray', vmin=0, vmax=255, aspect='auto', interpolation='nearest',
+              extent=(0, num_cysteines, rows, 0))
+    ax.hlines(np.arange(rows + 1), 0, num_cysteines, colors='gray', linewidth=0.5)
+    ax.vlines(np.arange(num_cysteines + 1), 0, rows, colors='gray', linewidth=0.5)
+    ax.set_title("Cysteine Redox Proteoforms", fontsize=20)
+    ax.set_xlabel("Cysteine Sites", fontsize=15)
+    ax.set_ylabel("Proteoforms", fontsize=15)
+    ax.set_xticks(np.arange(0.5, num_cysteines + 0.5))
+    ax.set_xticklabels(np.arange(1, num_cysteines + 1), fontsize=12)
+    fig.savefig(output_path, dpi=dpi, bbox_inches='tight')
+    plt.close(fig)
 
 
 # Initialize parameters
 num_cysteines = 10  # Total number of cysteines
 
-# Generate all unique proteoforms
-proteoforms = []
-for i in range(num_cysteines + 1):  # From 0 to 10 cysteines oxidized
-    for comb in combinations(range(num_cysteines), i):
-        proteoform = np.zeros(num_cysteines, dtype=int)
-        proteoform[list(comb)] = 1
-        proteoforms.append(proteoform)
-
-# Convert list of arrays to a 2D NumPy array
-data = np.array(proteoforms)
-
-# Create a heatmap
-plt.figure(figsize=(12, 60))
-ax = sns.heatmap(data, cmap="Greys", cbar=False, linewidths=0.5, linecolor='gray')
-ax.set_facecolor('black')  # Set the background color of the cells that have no line
-plt.title("Cysteine Redox Proteoforms", fontsize=20)
-plt.xlabel("Cysteine Sites", fontsize=15)
-plt.ylabel("Proteoforms", fontsize=15)
-plt.xticks(ticks=np.arange(0.5, num_cysteines + 0.5), labels=np.arange(1, num_cysteines + 1), fontsize=12)
-plt.yticks(fontsize=10)
-
-# Saving the figure with high resolution
-plt.savefig('/content/Cysteine_Redox_Proteoforms.png', dpi=300, bbox_inches='tight')
-plt.show()
-
-
-# Provide the link to download the saved file
-print("Download your high-resolution heatmap here: [Cysteine Redox Proteoforms](sandbox:/mnt/data/Cysteine_Redox_Proteoforms.png)")
+if __name__ == '__main__':
+    output_path = '/content/Cysteine_Redox_Proteoforms.png'
+
+    if num_cysteines <= 12:
+        plot_proteoform_map(num_cysteines, output_path)
+        paths = [output_path]
+    else:
+        # Large maps are written directly as raster tiles
+        paths = render_proteoform_map(num_cysteines, output_path)
+
+    print(f"Proteoform map saved to: {', '.join(paths[:3])}{' ...' if len(paths) > 3 else ''}")
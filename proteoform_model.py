@@ -0,0 +1,74 @@
+import math
+from itertools import combinations
+
+import numpy as np
+
+from binomial import pascal_row
+
+
+def band_sizes(num_cysteines):
+    """Number of proteoforms in each band (0..n cysteines oxidised): the n-th row of Pascal's triangle."""
+    return list(pascal_row(num_cysteines))
+
+
+def num_proteoforms(num_cysteines):
+    """Total number of cysteine redox proteoforms (2^n)."""
+    return 2 ** num_cysteines
+
+
+def _as_proteoform(num_cysteines, sites):
+    proteoform = np.zeros(num_cysteines, dtype=int)
+    proteoform[list(sites)] = 1
+    return proteoform
+
+
+def iter_band(num_cysteines, oxidised):
+    """Lazily yield the proteoforms of one band, in the same order as itertools.combinations."""
+    for sites in combinations(range(num_cysteines), oxidised):
+        yield _as_proteoform(num_cysteines, sites)
+
+
+def iter_proteoforms(num_cysteines):
+    """Lazily yield every proteoform, band by band (fully reduced first)."""
+    for oxidised in range(num_cysteines + 1):
+        yield from iter_band(num_cysteines, oxidised)
+
+
+def unrank_proteoform(num_cysteines, oxidised, rank):
+    """Return the rank-th proteoform (0-based) of the band with `oxidised` oxidised cysteines.
+
+    Uses the combinatorial number system, so any proteoform can be reached
+    directly without enumerating the ones before it.
+    """
+    size = math.comb(num_cysteines, oxidised)
+    if not 0 <= rank < size:
+        raise IndexError(f"rank {rank} out of range for a band of {size} proteoforms")
+    sites = []
+    remaining = oxidised
+    for site in range(num_cysteines):
+        if remaining == 0:
+            break
+        # Number of proteoforms in the band whose next oxidised site is this one
+        with_site = math.comb(num_cysteines - site - 1, remaining - 1)
+        if rank < with_site:
+            sites.append(site)
+            remaining -= 1
+        else:
+            rank -= with_site
+    return _as_proteoform(num_cysteines, sites)
+
+
+def rank_proteoform(proteoform):
+    """Inverse of unrank_proteoform: return (oxidised, rank) for a 0/1 proteoform vector."""
+    num_cysteines = len(proteoform)
+    sites = [site for site, state in enumerate(proteoform) if state]
+    remaining = len(sites)
+    rank = 0
+    previous = -1
+    for site in sites:
+        # Skip every proteoform whose next oxidised site comes before this one
+        for skipped in range(previous + 1, site):
+            rank += math.comb(num_cysteines - skipped - 1, remaining - 1)
+        remaining -= 1
+        previous = site
+    return len(sites), rank
@@ -0,0 +1,167 @@
+import argparse
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from proteome_masses import COLUMNS, read_mass_table
+
+CYSTEINE_COLUMN, REDUCED_COLUMN, OXIDISED_COLUMN = COLUMNS[1:]
+
+# Oxidised-mass cutoffs (kDa) at which a protein counts as detectable
+DEFAULT_CUTOFFS_KDA = (150, 200)
+
+HISTOGRAM_BINS = 30
+
+
+def cutoff_label(cutoff):
+    return f'{cutoff:g} kDa'
+
+
+def analyse_masses(cysteines, reduced_masses, oxidised_masses, cutoffs=DEFAULT_CUTOFFS_KDA,
+                   bins=HISTOGRAM_BINS, max_cysteines=20):
+    """Every summary behind the proteome figures, in one vectorized pass over the arrays.
+
+    Proteins without cysteines are excluded, as are proteins whose masses are
+    not finite (mass_engine gives NaN for sequences with non-residue symbols);
+    the latter are counted in 'num_dropped'. A protein is detectable at a cutoff
+    when its 100%-oxidised mass is <= the cutoff. Each protein is binned once by
+    the number of cutoffs it exceeds, so any number of cutoffs costs a single
+    bincount; cumulative sums then give the tallies for every cutoff.
+    """
+    cysteines = np.asarray(cysteines, dtype=np.int64)
+    reduced_masses = np.asarray(reduced_masses, dtype=np.float64)
+    oxidised_masses = np.asarray(oxidised_masses, dtype=np.float64)
+    finite = np.isfinite(reduced_masses) & np.isfinite(oxidised_masses)
+    num_dropped = int(np.count_nonzero((cysteines > 0) & ~finite))
+    keep = (cysteines > 0) & finite
+    cysteines = cysteines[keep]
+    reduced_masses = reduced_masses[keep]
+    oxidised_masses = oxidised_masses[keep]
+    cutoffs = np.sort(np.asarray(cutoffs, dtype=np.float64))
+    num_cutoffs = len(cutoffs)
+
+    # Index of the first cutoff the protein fits under (num_cutoffs if none)
+    cutoff_index = np.searchsorted(cutoffs, oxidised_masses, side='left')
+    width = int(cysteines.max()) + 1 if len(cysteines) else 1
+    tally = np.bincount(cysteines * (num_cutoffs + 1) + cutoff_index,
+                        minlength=width * (num_cutoffs + 1)).reshape(width, num_cutoffs + 1)
+    # detectable[c, j]: proteins with c cysteines that fit under cutoffs[j]
+    detectable = np.cumsum(tally, axis=1)[:, :num_cutoffs]
+    totals = tally.sum(axis=1)
+
+    counts = np.arange(1, max_cysteines + 1)
+    padded_totals = np.zeros(max_cysteines + 1, dtype=np.int64)
+    padded_detectable = np.zeros((max_cysteines + 1, num_cutoffs), dtype=np.int64)
+    shown = min(width, max_cysteines + 1)
+    padded_totals[:shown] = totals[:shown]
+    padded_detectable[:shown] = detectable[:shown]
+    per_cysteine = pd.DataFrame({'Total Proteins': padded_totals[1:]}, index=pd.Index(counts, name=CYSTEINE_COLUMN))
+    for j, cutoff in enumerate(cutoffs):
+        per_cysteine[f'Detectable (≤{cutoff_label(cutoff)})'] = padded_detectable[1:, j]
+
+    num_proteins = len(cysteines)
+    detectable_total = detectable.sum(axis=0)
+    return {
+        'num_proteins': num_proteins,
+        'num_dropped': num_dropped,
+        'reduced_histogram': np.histogram(reduced_masses, bins=bins),
+        'oxidised_histogram': np.histogram(oxidised_masses, bins=bins),
+        'cutoffs': cutoffs,
+        'detectable': detectable_total,
+        'detectable_percent': detectable_total / num_proteins * 100 if num_proteins else np.full(num_cutoffs, np.nan),
+        'per_cysteine': per_cysteine,
+    }
+
+
+def analyse_table(path, cutoffs=DEFAULT_CUTOFFS_KDA, bins=HISTOGRAM_BINS, max_cysteines=20):
+    """Load the three mass columns of a mass table (cysteine-free proteins filtered on load) and analyse them."""
+    table = read_mass_table(path, columns=[CYSTEINE_COLUMN, REDUCED_COLUMN, OXIDISED_COLUMN],
+                            filters=[(CYSTEINE_COLUMN, '>', 0)])
+    return analyse_masses(table[CYSTEINE_COLUMN].to_numpy(), table[REDUCED_COLUMN].to_numpy(),
+                          table[OXIDISED_COLUMN].to_numpy(), cutoffs, bins, max_cysteines)
+
+
+def plot_mass_histogram(fig, histogram, form):
+    counts, edges = histogram
+    ax = fig.subplots()
+    ax.hist(edges[:-1], bins=edges, weights=counts, color='skyblue', edgecolor='black')
+    ax.set_xlabel(f'100%-{form} Molecular Weight (kDa)', fontsize=14)
+    ax.set_ylabel('Number of Proteins', fontsize=14)
+    ax.set_title(f'Distribution of Proteins by 100%-{form} Molecular Weight', fontsize=16)
+    ax.set_xlim(0, 500)  # Limit the x-axis to 500 kDa to zoom in on the relevant range
+
+
+def plot_detectable_percent(fig, cutoffs, percentages):
+    ax = fig.subplots()
+    ax.bar([cutoff_label(cutoff) for cutoff in cutoffs], percentages, color='skyblue')
+    ax.set_xlabel('Mass Cutoff', fontsize=14)
+    ax.set_ylabel('Percentage of Detectable Proteins', fontsize=14)
+    ax.set_title('Percentage of Detectable Proteins by Mass Cutoff', fontsize=16)
+
+
+def plot_per_cysteine(fig, per_cysteine):
+    ax = fig.subplots()
+    colors = ['skyblue', 'orange', 'green'] if per_cysteine.shape[1] <= 3 else None
+    per_cysteine.plot(kind='bar', ax=ax, color=colors, edgecolor='black')
+    ax.set_xlabel(f'Cysteine Residue Count (1-{per_cysteine.index.max()})', fontsize=14)
+    ax.set_ylabel('Number of Proteins', fontsize=14)
+    ax.set_title('Proteins and Detectable Proteins by Cysteine Residue Count', fontsize=16)
+
+
+FIGURES = {
+    'histogram_reduced_molecular_weight_scaled.png':
+        ((10, 6), plot_mass_histogram, lambda analysis: (analysis['reduced_histogram'], 'Reduced')),
+    'histogram_oxidised_molecular_weight_scaled.png':
+        ((10, 6), plot_mass_histogram, lambda analysis: (analysis['oxidised_histogram'], 'Oxidised')),
+    'detectable_proteins_cutoff.png':
+        ((8, 6), plot_detectable_percent, lambda analysis: (analysis['cutoffs'], analysis['detectable_percent'])),
+    'proteins_per_cysteine_count.png':
+        ((12, 6), plot_per_cysteine, lambda analysis: (analysis['per_cysteine'],)),
+}
+
+
+def _render_figure(job):
+    figsize, plot, args, path, dpi = job
+    from matplotlib.figure import Figure
+
+    # Bare Figures need no pyplot/GUI backend, so workers render headlessly
+    fig = Figure(figsize=figsize)
+    plot(fig, *args)
+    fig.tight_layout()
+    fig.savefig(path, dpi=dpi)
+    return path
+
+
+def render_figures(analysis, output_dir, dpi=300, processes=None):
+    """Save every figure of an analysis to output_dir, one figure per worker process; returns the paths."""
+    jobs = [(figsize, plot, arguments(analysis), os.path.join(output_dir, name), dpi)
+            for name, (figsize, plot, arguments) in FIGURES.items()]
+    with ProcessPoolExecutor(max_workers=processes or len(jobs)) as executor:
+        return list(executor.map(_render_figure, jobs))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Summarise and plot a proteome mass table.')
+    parser.add_argument('input', help='Mass table from proteome_masses (.parquet, .feather, .csv or .xlsx)')
+    parser.add_argument('output_dir', help='Directory for the figures and the per-cysteine table')
+    parser.add_argument('--cutoffs', type=float, nargs='+', default=list(DEFAULT_CUTOFFS_KDA),
+                        help='Oxidised-mass detection cutoffs in kDa (default: 150 200)')
+    parser.add_argument('--max-cysteines', type=int, default=20, help='Largest cysteine count tabulated')
+    parser.add_argument('--processes', type=int, default=None, help='Figure rendering processes')
+    args = parser.parse_args(argv)
+
+    analysis = analyse_table(args.input, args.cutoffs, max_cysteines=args.max_cysteines)
+    if analysis['num_dropped']:
+        print(f"Skipped {analysis['num_dropped']} proteins without finite masses (e.g. stop symbols in the sequence)")
+    os.makedirs(args.output_dir, exist_ok=True)
+    analysis['per_cysteine'].to_csv(os.path.join(args.output_dir, 'proteins_per_cysteine_count.csv'))
+    for cutoff, percent in zip(analysis['cutoffs'], analysis['detectable_percent']):
+        print(f"Detectable at {cutoff_label(cutoff)}: {percent:.1f}% of {analysis['num_proteins']} proteins")
+    render_figures(analysis, args.output_dir, processes=args.processes)
+    print(f"Figures saved to: {args.output_dir}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,221 @@
+import argparse
+import gzip
+import os
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+import pandas as pd
+import pyarrow as pa
+from Bio.SeqIO.FastaIO import SimpleFastaParser
+
+from cleland_core import PEG_MASS_KDA
+from mass_engine import sequence_masses
+from parallel import bounded_map
+
+COLUMNS = [
+    'Protein_ID',
+    'Cysteine Residue Integer',
+    '100%-Reduced_Molecular_Mass',
+    '100%-Oxidised_Molecular_Mass',
+]
+
+SCHEMA = pa.schema([
+    (COLUMNS[0], pa.string()),
+    (COLUMNS[1], pa.int32()),
+    (COLUMNS[2], pa.float64()),
+    (COLUMNS[3], pa.float64()),
+])
+
+# Excel worksheets cannot hold more rows than this (including the header)
+EXCEL_MAX_ROWS = 1048576
+
+
+def open_fasta(fasta_path):
+    """Open a plain or gzipped FASTA file for text reading."""
+    if str(fasta_path).endswith('.gz'):
+        return gzip.open(fasta_path, 'rt')
+    return open(fasta_path, 'r')
+
+
+def iter_fasta_chunks(fasta_path, chunk_size):
+    """Yield lists of (protein_id, sequence) tuples, chunk_size records at a time."""
+    with open_fasta(fasta_path) as fasta_file:
+        records = ((title.split(None, 1)[0], sequence) for title, sequence in SimpleFastaParser(fasta_file))
+        while True:
+            chunk = list(islice(records, chunk_size))
+            if not chunk:
+                return
+            yield chunk
+
+
+def compute_chunk(chunk):
+    """Compute cysteine count and reduced/oxidised mass (kDa) for a chunk of records."""
+    protein_ids = [protein_id for protein_id, _ in chunk]
+    masses = sequence_masses(sequence for _, sequence in chunk)
+    cysteine_counts = masses['cysteines']
+    reduced_masses = masses['average_mass']
+    return pd.DataFrame({
+        COLUMNS[0]: protein_ids,
+        COLUMNS[1]: cysteine_counts,
+        COLUMNS[2]: reduced_masses,
+        COLUMNS[3]: reduced_masses + cysteine_counts * PEG_MASS_KDA,
+    }, columns=COLUMNS)
+
+
+class _ParquetWriter:
+    def __init__(self, path, row_group_size=100000):
+        import pyarrow.parquet as pq
+
+        self.writer = pq.ParquetWriter(path, SCHEMA, compression='zstd')
+        self.row_group_size = row_group_size
+        self.buffer = []
+        self.buffered_rows = 0
+
+    def write(self, df):
+        # Chunks are batched into large row groups so min/max statistics stay useful for filtering
+        self.buffer.append(pa.Table.from_pandas(df, schema=SCHEMA, preserve_index=False))
+        self.buffered_rows += len(df)
+        if self.buffered_rows >= self.row_group_size:
+            self._flush()
+
+    def _flush(self):
+        if self.buffer:
+            self.writer.write_table(pa.concat_tables(self.buffer), row_group_size=self.row_group_size)
+        self.buffer = []
+        self.buffered_rows = 0
+
+    def close(self):
+        self._flush()
+        self.writer.close()
+
+
+class _FeatherWriter:
+    def __init__(self, path):
+        # Left uncompressed so the file can be memory-mapped without a copy
+        self.sink = pa.OSFile(str(path), 'wb')
+        self.writer = pa.ipc.new_file(self.sink, SCHEMA)
+
+    def write(self, df):
+        self.writer.write_table(pa.Table.from_pandas(df, schema=SCHEMA, preserve_index=False))
+
+    def close(self):
+        self.writer.close()
+        self.sink.close()
+
+
+class _CsvWriter:
+    def __init__(self, path):
+        self.path = path
+        self.header = True
+
+    def write(self, df):
+        df.to_csv(self.path, mode='w' if self.header else 'a', header=self.header, index=False)
+        self.header = False
+
+    def close(self):
+        if self.header:
+            pd.DataFrame(columns=COLUMNS).to_csv(self.path, index=False)
+
+
+class _ExcelWriter:
+    def __init__(self, path):
+        from openpyxl import Workbook
+
+        self.path = path
+        self.workbook = Workbook(write_only=True)
+        self.sheet = self.workbook.create_sheet()
+        self.sheet.append(COLUMNS)
+        self.rows = 1
+
+    def write(self, df):
+        self.rows += len(df)
+        if self.rows > EXCEL_MAX_ROWS:
+            raise ValueError("Mass table exceeds the Excel row limit; write .parquet or .feather instead")
+        for row in df.itertuples(index=False, name=None):
+            self.sheet.append(row)
+
+    def close(self):
+        self.workbook.save(self.path)
+
+
+def open_table_writer(output_path):
+    """Return an incremental writer for the mass table, chosen by file extension."""
+    extension = os.path.splitext(str(output_path))[1].lower()
+    if extension == '.parquet':
+        return _ParquetWriter(output_path)
+    if extension in ('.feather', '.arrow'):
+        return _FeatherWriter(output_path)
+    if extension == '.csv':
+        return _CsvWriter(output_path)
+    if extension == '.xlsx':
+        return _ExcelWriter(output_path)
+    raise ValueError(f"Unsupported output format: {output_path}")
+
+
+def read_mass_table(path, columns=None, filters=None, memory_map=False):
+    """Load the mass table, reading only the requested columns and matching rows.
+
+    filters uses the pyarrow DNF syntax, e.g. [('Cysteine Residue Integer', '>', 0)].
+    For Parquet, row groups whose statistics exclude the filter are skipped; a
+    Feather file can be memory-mapped instead of read into memory.
+    """
+    import pyarrow.parquet as pq
+
+    extension = os.path.splitext(str(path))[1].lower()
+    if extension == '.parquet':
+        table = pq.read_table(path, columns=columns, filters=filters, memory_map=memory_map)
+        return table.to_pandas()
+
+    if extension in ('.feather', '.arrow'):
+        source = pa.memory_map(str(path)) if memory_map else pa.OSFile(str(path))
+        table = pa.ipc.open_file(source).read_all()
+    elif extension == '.csv':
+        table = pa.Table.from_pandas(pd.read_csv(path), schema=SCHEMA, preserve_index=False)
+    elif extension == '.xlsx':
+        table = pa.Table.from_pandas(pd.read_excel(path), schema=SCHEMA, preserve_index=False)
+    else:
+        raise ValueError(f"Unsupported mass table format: {path}")
+
+    if filters:
+        table = table.filter(pq.filters_to_expression(filters))
+    if columns is not None:
+        table = table.select(columns)
+    return table.to_pandas()
+
+
+def build_mass_table(fasta_path, output_path, chunk_size=5000, processes=None, max_pending=None):
+    """Stream a (gzipped) FASTA file through a process pool and write the mass table incrementally.
+
+    Records are read chunk_size at a time and at most max_pending chunks are in
+    flight, so memory stays flat regardless of proteome size. Returns the number
+    of proteins written.
+    """
+    processes = processes or os.cpu_count() or 1
+    max_pending = max_pending or 2 * processes
+    writer = open_table_writer(output_path)
+    total = 0
+    try:
+        with ProcessPoolExecutor(max_workers=processes) as executor:
+            chunks = iter_fasta_chunks(fasta_path, chunk_size)
+            for chunk_df in bounded_map(executor, compute_chunk, chunks, max_pending):
+                writer.write(chunk_df)
+                total += len(chunk_df)
+    finally:
+        writer.close()
+    return total
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Build the cysteine/molecular mass table for a proteome FASTA file.')
+    parser.add_argument('fasta', help='Path to the (optionally gzipped) FASTA file')
+    parser.add_argument('output', help='Output table (.parquet, .feather, .csv or .xlsx)')
+    parser.add_argument('--chunk-size', type=int, default=5000, help='Records per worker task')
+    parser.add_argument('--processes', type=int, default=None, help='Worker processes (default: all cores)')
+    args = parser.parse_args(argv)
+
+    total = build_mass_table(args.fasta, args.output, chunk_size=args.chunk_size, processes=args.processes)
+    print(f"Mass table with {total} proteins saved to: {args.output}")
+
+
+if __name__ == '__main__':
+    main()
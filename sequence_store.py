@@ -0,0 +1,164 @@
+import argparse
+import logging
+import os
+import sqlite3
+from collections import OrderedDict
+from functools import lru_cache
+from threading import Lock
+
+logger = logging.getLogger(__name__)
+
+UNIPROT_URL = 'https://rest.uniprot.org/uniprotkb'
+
+
+def accession_from_id(protein_id):
+    """Extract the accession from a UniProt FASTA identifier such as 'sp|P04406|G3P_HUMAN'."""
+    parts = protein_id.split('|')
+    return parts[1] if len(parts) >= 3 else protein_id
+
+
+def parse_fasta_text(fasta):
+    """Return the sequence from the text of a single-record FASTA file."""
+    return ''.join(line.strip() for line in fasta.splitlines() if not line.startswith('>'))
+
+
+def build_sequence_index(fasta_path, db_path, batch_size=10000):
+    """Index every record of a (gzipped) FASTA file into an SQLite database keyed by accession.
+
+    Returns the number of sequences indexed.
+    """
+    # Only indexing needs these, so lookups stay free of Biopython and pandas
+    from Bio.SeqIO.FastaIO import SimpleFastaParser
+
+    from proteome_masses import open_fasta
+
+    connection = sqlite3.connect(db_path)
+    try:
+        connection.execute('CREATE TABLE IF NOT EXISTS sequences (accession TEXT PRIMARY KEY, sequence TEXT NOT NULL)')
+        total = 0
+        batch = []
+        with open_fasta(fasta_path) as fasta_file:
+            for title, sequence in SimpleFastaParser(fasta_file):
+                batch.append((accession_from_id(title.split(None, 1)[0]), sequence))
+                if len(batch) >= batch_size:
+                    connection.executemany('INSERT OR REPLACE INTO sequences VALUES (?, ?)', batch)
+                    total += len(batch)
+                    batch = []
+        connection.executemany('INSERT OR REPLACE INTO sequences VALUES (?, ?)', batch)
+        total += len(batch)
+        connection.commit()
+    finally:
+        connection.close()
+    return total
+
+
+class SequenceProvider:
+    """Look up protein sequences by UniProt accession.
+
+    Lookups check an in-process LRU cache first, then an optional local SQLite
+    index (see build_sequence_index), and only then fall back to UniProt over
+    a pooled HTTP session. A missing or unreadable index is logged and skipped,
+    so lookups carry on remotely. base_url can point at a local stand-in server, and
+    offline=True disables the network fallback entirely.
+    """
+
+    def __init__(self, db_path=None, cache_size=4096, base_url=UNIPROT_URL, timeout=10, offline=False):
+        self.db_path = db_path
+        self.cache_size = cache_size
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+        self.offline = offline
+        self._cache = OrderedDict()
+        self._lock = Lock()
+        self._connection = None
+        self._session = None
+
+    def get(self, accession):
+        """Return the sequence for an accession, or None if it cannot be found."""
+        accession = accession.strip().upper()
+        with self._lock:
+            if accession in self._cache:
+                self._cache.move_to_end(accession)
+                return self._cache[accession]
+
+        sequence = self._lookup_local(accession)
+        if sequence is None and not self.offline:
+            sequence = self._fetch_remote(accession)
+        if sequence is not None:
+            self._remember(accession, sequence)
+        return sequence
+
+    def _remember(self, accession, sequence):
+        with self._lock:
+            self._cache[accession] = sequence
+            self._cache.move_to_end(accession)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    def _lookup_local(self, accession):
+        if self.db_path is None:
+            return None
+        with self._lock:
+            try:
+                if self._connection is None:
+                    # Read-only and shareable between the threads of a Streamlit server
+                    uri = f'file:{self.db_path}?mode=ro'
+                    self._connection = sqlite3.connect(uri, uri=True, check_same_thread=False)
+                row = self._connection.execute(
+                    'SELECT sequence FROM sequences WHERE accession = ?', (accession,)
+                ).fetchone()
+            except sqlite3.Error as e:
+                logger.warning("Sequence index %s is unusable (%s); falling back to remote lookups", self.db_path, e)
+                if self._connection is not None:
+                    self._connection.close()
+                    self._connection = None
+                self.db_path = None
+                return None
+        return row[0] if row else None
+
+    def _fetch_remote(self, accession):
+        import requests
+
+        with self._lock:
+            if self._session is None:
+                session = requests.Session()
+                adapter = requests.adapters.HTTPAdapter(pool_connections=4, pool_maxsize=16, max_retries=2)
+                session.mount('http://', adapter)
+                session.mount('https://', adapter)
+                self._session = session
+        response = self._session.get(f'{self.base_url}/{accession}.fasta', timeout=self.timeout)
+        if response.status_code in (400, 404):
+            return None
+        response.raise_for_status()
+        return parse_fasta_text(response.text) or None
+
+    def close(self):
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+        if self._session is not None:
+            self._session.close()
+            self._session = None
+
+
+@lru_cache(maxsize=None)
+def get_default_provider():
+    """Shared provider, configured from the CLELAND_SEQUENCE_DB and CLELAND_OFFLINE environment variables."""
+    return SequenceProvider(
+        db_path=os.environ.get('CLELAND_SEQUENCE_DB'),
+        offline=os.environ.get('CLELAND_OFFLINE', '') not in ('', '0'),
+    )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Index a proteome FASTA file for offline sequence lookups.')
+    parser.add_argument('fasta', help='Path to the (optionally gzipped) FASTA file, e.g. proteins.fasta.gz')
+    parser.add_argument('db', help='SQLite database to create or update')
+    args = parser.parse_args(argv)
+
+    total = build_sequence_index(args.fasta, args.db)
+    print(f"Indexed {total} sequences into: {args.db}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,105 @@
+import math
+
+import pandas as pd
+
+
+def estimate_solution_space_size(num_molecules, num_proteoforms):
+    """Number of ways to distribute num_molecules over num_proteoforms states (stars and bars)."""
+    return math.comb(num_molecules + num_proteoforms - 1, num_proteoforms - 1)
+
+
+def log_solution_space_size(num_molecules, num_proteoforms):
+    """Natural log of estimate_solution_space_size, without big integers.
+
+    Uses log-gamma functions, except when one side of the binomial is small:
+    there the lgamma terms are huge and nearly cancel, so the short product
+    C(m, r) = prod((m - r + i) / i) is summed in log space instead.
+    """
+    m = num_molecules + num_proteoforms - 1
+    r = min(num_molecules, num_proteoforms - 1)
+    if r <= 1000:
+        return math.fsum(math.log1p((m - r) / i) for i in range(1, r + 1))
+    return math.lgamma(m + 1) - math.lgamma(m - r + 1) - math.lgamma(r + 1)
+
+
+def solution_space_table(num_proteoforms, max_molecules, start=1):
+    """Solution space sizes for start..max_molecules molecules as a DataFrame.
+
+    Each row is derived from the previous one with the exact ratio
+    C(n + k, k - 1) = C(n + k - 1, k - 1) * (n + k) / (n + 1), so no
+    binomial coefficient is recomputed from scratch.
+    """
+    size = estimate_solution_space_size(start, num_proteoforms)
+    molecule_counts = []
+    sizes = []
+    for num_molecules in range(start, max_molecules + 1):
+        molecule_counts.append(num_molecules)
+        sizes.append(size)
+        size = size * (num_molecules + num_proteoforms) // (num_molecules + 1)
+    return pd.DataFrame({"Molecule Count": molecule_counts, "Solution Space Size": sizes})
+
+
+def find_molecule_count_for_M(M, num_proteoforms, table=False, max_table_rows=1000000):
+    """Smallest number of molecules whose solution space size reaches or exceeds M.
+
+    The threshold is bracketed by exponential search and located by binary
+    search on the log-gamma size, then confirmed with exact integers. Returns
+    (molecule_count, solution_space_size, results), where results is the table
+    of sizes from 1 molecule up to the threshold if table=True, else None.
+    """
+    log_M = math.log(M)
+    high = 1
+    while log_solution_space_size(high, num_proteoforms) < log_M:
+        high *= 2
+    low = high // 2
+    while high - low > 1:
+        middle = (low + high) // 2
+        if log_solution_space_size(middle, num_proteoforms) < log_M:
+            low = middle
+        else:
+            high = middle
+
+    # Floating-point rounding can misplace the threshold slightly (by many
+    # molecules at Avogadro scale), so widen the bracket until exact integers
+    # confirm it and finish the search exactly
+    def reaches(num_molecules):
+        return estimate_solution_space_size(num_molecules, num_proteoforms) >= M
+
+    step = 1
+    while low >= 1 and reaches(low):
+        high, low = low, low - step
+        step *= 2
+    low = max(low, 0)
+    step = 1
+    while not reaches(high):
+        low, high = high, high + step
+        step *= 2
+    while high - low > 1:
+        middle = (low + high) // 2
+        if reaches(middle):
+            high = middle
+        else:
+            low = middle
+    num_molecules = max(high, 1)
+
+    results = None
+    if table:
+        if num_molecules > max_table_rows:
+            raise ValueError(f"Table would have {num_molecules} rows (more than max_table_rows={max_table_rows})")
+        results = solution_space_table(num_proteoforms, num_molecules)
+    return num_molecules, estimate_solution_space_size(num_molecules, num_proteoforms), results
+
+
+def sweep_molecule_counts(pairs):
+    """Find the threshold molecule count for many (M, num_proteoforms) pairs in one call."""
+    rows = []
+    for M, num_proteoforms in pairs:
+        num_molecules, size, _ = find_molecule_count_for_M(M, num_proteoforms)
+        rows.append({
+            "M": M,
+            "Number of Proteoforms": num_proteoforms,
+            "Molecule Count": num_molecules,
+            "Solution Space Size": size,
+            "log10 Solution Space Size": log_solution_space_size(num_molecules, num_proteoforms) / math.log(10),
+        })
+    return pd.DataFrame(rows)
@@ -0,0 +1,231 @@
+import argparse
+import os
+import re
+import tarfile
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from cleland_core import CLELAND_MAX_OXIDISED_MASS
+from parallel import bounded_map
+from peg_placement import CLASH_DISTANCE, find_cysteines, load_peg_template, parse_structure, place_pegs
+from peg_placement import placement_table, write_pegylated_pdb
+from proteome_masses import COLUMNS, read_mass_table
+
+STRUCTURE_EXTENSIONS = ('.pdb', '.ent', '.cif', '.mmcif')
+
+# Theoretical maximum accessible surface area of a cysteine residue (Tien et al. 2013), Angstrom^2
+CYSTEINE_MAX_ASA = 167.0
+
+# Cysteines with at least this relative SASA count as solvent exposed
+EXPOSED_RELATIVE_SASA = 0.2
+
+# AlphaFold DB file names, e.g. AF-Q9GZT9-F1-model_v4.pdb
+_ALPHAFOLD_NAME = re.compile(r'AF-([A-Za-z0-9]+)-F\d+')
+
+SUMMARY_COLUMNS = [
+    'structure', 'accession', 'status', 'error', 'num_residues', 'num_cysteines', 'num_exposed',
+    'mean_cysteine_plddt', 'protein_clashes', 'peg_clashes', 'model',
+]
+
+# PEG template parsed once per worker process
+_TEMPLATE = None
+
+
+def structure_accession(name):
+    """UniProt accession from an AlphaFold file name (else the file stem)."""
+    match = _ALPHAFOLD_NAME.search(os.path.basename(name))
+    if match:
+        return match.group(1)
+    return os.path.basename(name).split('.')[0]
+
+
+def is_structure_file(name):
+    name = name[:-3] if name.endswith('.gz') else name
+    return name.lower().endswith(STRUCTURE_EXTENSIONS)
+
+
+def iter_structure_sources(source, accessions=None):
+    """Yield (name, data) for every structure file in a directory or tarball.
+
+    data is None for files on disk (workers read them themselves); tarball
+    members are read one at a time in streaming mode and passed as bytes.
+    accessions optionally restricts the files to those proteins.
+    """
+    accessions = set(accessions) if accessions is not None else None
+
+    def wanted(name):
+        return is_structure_file(name) and (accessions is None or structure_accession(name) in accessions)
+
+    if os.path.isdir(source):
+        for entry in sorted(os.scandir(source), key=lambda entry: entry.name):
+            if entry.is_file() and wanted(entry.name):
+                yield entry.path, None
+        return
+    with tarfile.open(source, 'r|*') as archive:
+        for member in archive:
+            if member.isfile() and wanted(member.name):
+                yield member.name, archive.extractfile(member).read()
+
+
+def detectable_accessions(mass_table_path, max_oxidised_mass=CLELAND_MAX_OXIDISED_MASS):
+    """Accessions of the cysteine-containing proteins resolvable by Cleland immunoblotting."""
+    from sequence_store import accession_from_id
+
+    table = read_mass_table(mass_table_path, columns=[COLUMNS[0]],
+                            filters=[(COLUMNS[1], '>', 0), (COLUMNS[3], '<', max_oxidised_mass)])
+    return {accession_from_id(protein_id) for protein_id in table[COLUMNS[0]]}
+
+
+def cysteine_exposure(structure, residues):
+    """Solvent accessible surface area (Angstrom^2), relative SASA and pLDDT of each cysteine.
+
+    AlphaFold models store the per-residue pLDDT in the B-factor column.
+    """
+    from Bio.PDB.SASA import ShrakeRupley
+
+    ShrakeRupley().compute(structure[0], level='R')
+    sasa = np.array([residue.sasa for residue in residues], dtype=np.float64)
+    return {
+        'sasa': sasa,
+        'relative_sasa': sasa / CYSTEINE_MAX_ASA,
+        'plddt': np.array([residue['CA'].bfactor for residue in residues], dtype=np.float64),
+    }
+
+
+def process_structure(name, data=None, template=None, output_dir=None, clash_distance=CLASH_DISTANCE):
+    """Cysteine exposure and (if a PEG template is given) PEG placement for one structure.
+
+    Returns (summary dict, per-cysteine DataFrame). With output_dir, the
+    PEGylated model is written there as <stem>_PEG.pdb.
+    """
+    structure = parse_structure(name, data=data)
+    residues = find_cysteines(structure)['residues']
+    exposure = cysteine_exposure(structure, residues)
+    cysteines = pd.DataFrame({
+        'structure': os.path.basename(name),
+        'accession': structure_accession(name),
+        'chain': [residue.get_parent().id for residue in residues],
+        'residue_number': [residue.id[1] for residue in residues],
+        'plddt': exposure['plddt'],
+        'sasa': exposure['sasa'],
+        'relative_sasa': exposure['relative_sasa'],
+        'exposed': exposure['relative_sasa'] >= EXPOSED_RELATIVE_SASA,
+    })
+
+    model_path = None
+    placement = None
+    if template is not None:
+        placement = place_pegs(structure, template, clash_distance=clash_distance)
+        placed = placement_table(placement)
+        for column in ('tilt_degrees', 'protein_clashes', 'peg_clashes'):
+            cysteines[column] = placed[column].to_numpy()
+        if output_dir is not None:
+            model_path = os.path.join(output_dir, f"{os.path.basename(name).split('.')[0]}_PEG.pdb")
+            write_pegylated_pdb(structure, template, placement, model_path)
+
+    summary = {
+        'structure': os.path.basename(name),
+        'accession': structure_accession(name),
+        'status': 'ok',
+        'num_residues': sum(1 for _ in structure[0].get_residues()),
+        'num_cysteines': len(residues),
+        'num_exposed': int(cysteines['exposed'].sum()),
+        'mean_cysteine_plddt': float(exposure['plddt'].mean()) if len(residues) else np.nan,
+        'protein_clashes': int(cysteines['protein_clashes'].sum()) if placement is not None else np.nan,
+        'peg_clashes': placement['peg_clash_pairs'] if placement is not None else np.nan,
+        'model': model_path,
+    }
+    return summary, cysteines
+
+
+def _init_worker(peg_path):
+    global _TEMPLATE
+    _TEMPLATE = load_peg_template(peg_path) if peg_path else None
+
+
+def _process_job(job):
+    name, data, output_dir, options = job
+    try:
+        return process_structure(name, data, _TEMPLATE, output_dir, **options)
+    except Exception as e:
+        # One malformed structure should not stop the batch
+        summary = {'structure': os.path.basename(name), 'accession': structure_accession(name),
+                   'status': 'error', 'error': f"{type(e).__name__}: {e}"}
+        return summary, None
+
+
+def process_structures(source, output_dir, peg_path=None, accessions=None, write_models=True, processes=None,
+                       max_pending=None, **options):
+    """Process every AlphaFold structure in a directory or tarball, one structure per worker task.
+
+    Per-cysteine rows are appended to output_dir/cysteines.csv as results
+    arrive, and one row per structure is written to output_dir/structures.csv
+    (also returned). With peg_path, PEG is placed on every cysteine and, if
+    write_models, the models are saved under output_dir/models.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    models_dir = None
+    if peg_path and write_models:
+        models_dir = os.path.join(output_dir, 'models')
+        os.makedirs(models_dir, exist_ok=True)
+    cysteines_path = os.path.join(output_dir, 'cysteines.csv')
+    if os.path.exists(cysteines_path):
+        os.remove(cysteines_path)
+
+    processes = processes or os.cpu_count()
+    max_pending = max_pending or 4 * processes
+    jobs = ((name, data, models_dir, options) for name, data in iter_structure_sources(source, accessions))
+    summaries = []
+    with ProcessPoolExecutor(max_workers=processes, initializer=_init_worker, initargs=(peg_path,)) as executor:
+        for summary, cysteines in bounded_map(executor, _process_job, jobs, max_pending):
+            summaries.append(summary)
+            if cysteines is not None and len(cysteines):
+                cysteines.to_csv(cysteines_path, mode='a', header=not os.path.exists(cysteines_path), index=False)
+
+    summary = pd.DataFrame(summaries, columns=SUMMARY_COLUMNS).astype(
+        {column: 'Int64' for column in ('num_residues', 'num_cysteines', 'num_exposed', 'protein_clashes',
+                                        'peg_clashes')})
+    summary.to_csv(os.path.join(output_dir, 'structures.csv'), index=False)
+    return summary
+
+
+def summarise_structures(summary):
+    """Overall counts and the distribution of cysteine numbers across the processed structures."""
+    processed = summary[summary['status'] == 'ok']
+    num_cysteines = processed['num_cysteines'].sum()
+    return {
+        'structures': len(summary),
+        'failed': int((summary['status'] != 'ok').sum()),
+        'cysteines': int(num_cysteines),
+        'exposed_fraction': float(processed['num_exposed'].sum() / num_cysteines) if num_cysteines else np.nan,
+        'cysteine_count_distribution': processed['num_cysteines'].value_counts().sort_index(),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Cysteine exposure and PEG models for a set of AlphaFold structures.')
+    parser.add_argument('source', help='Directory or tarball of AlphaFold .pdb/.cif files (optionally gzipped)')
+    parser.add_argument('output_dir', help='Directory for cysteines.csv, structures.csv and the PEG models')
+    parser.add_argument('--peg', default=None, help='PEG template PDB; without it only exposure is reported')
+    parser.add_argument('--mass-table', default=None,
+                        help='Only process proteins that are detectable according to this proteome mass table')
+    parser.add_argument('--max-oxidised-mass', type=float, default=CLELAND_MAX_OXIDISED_MASS,
+                        help='Detection limit (kDa) used with --mass-table')
+    parser.add_argument('--no-models', action='store_true', help='Do not write the PEGylated structures')
+    parser.add_argument('--processes', type=int, default=None, help='Worker processes (default: all cores)')
+    args = parser.parse_args(argv)
+
+    accessions = detectable_accessions(args.mass_table, args.max_oxidised_mass) if args.mass_table else None
+    summary = process_structures(args.source, args.output_dir, peg_path=args.peg, accessions=accessions,
+                                 write_models=not args.no_models, processes=args.processes)
+    overview = summarise_structures(summary)
+    print(f"Processed {overview['structures']} structures ({overview['failed']} failed), "
+          f"{overview['cysteines']} cysteines, {overview['exposed_fraction']:.1%} solvent exposed")
+    print(overview['cysteine_count_distribution'].to_string())
+    print(f"Results saved to: {args.output_dir}")
+
+
+if __name__ == '__main__':
+    main()